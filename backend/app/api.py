@@ -1,19 +1,28 @@
 # backend/app/api.py
 
 # (최신본) Authorization 헤더를 받아들이되(미필수), 업로드는 원본파일명 함께 반환.
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from sqlmodel import Session, select, delete
-from uuid import uuid4
 import os, json, tempfile
 import mlflow
 
 from .db import get_session
 from .store_sql import Repo
 from .models import Project as ProjectModel, Analysis as AnalysisModel, MLTask as MLTaskModel
-from .services.data_loader import load_dataset
-from .queue_mongo import create_job, get_job
-from .config import ARTIFACT_ROOT, MLFLOW_URI
+from .services.data_loader import load_preview, read_window, cache_stats
+from .services.dataset_store import ALLOWED_EXTS, iter_file_chunks, save_stream, resolve_dataset_id
+from .services import upload_sessions
+from .services.ingest import ingest_status, schedule_ingest, schedule_profile
+from .services.profiling import get_profile
+from .services.schema import get_schema
+from .queue_mongo import (
+    QuotaExceeded, cancel_job, create_job_idempotent, create_jobs_idempotent, get_job, get_jobs,
+)
+from .services.auth_utils import decode_token_optional
+from .services.run_events import MAX_STREAM_IDS, stream_run_events
+from .config import MLFLOW_URI, settings
+from .utils.json_safe import FastJSONResponse, df_preview_safe
 
 router = APIRouter()
 
@@ -43,18 +52,85 @@ def refresh(authorization: str | None = Header(None)):
 # Upload (dcc.Upload → 서버 파일 저장)
 # -------------------------------------------------------------------
 @router.post("/upload")
-async def upload_file(f: UploadFile = File(...), authorization: str | None = Header(None)):
-    os.makedirs(os.path.join(ARTIFACT_ROOT, "datasets"), exist_ok=True)
+def upload_file(f: UploadFile = File(...), authorization: str | None = Header(None)):
+    # sync 핸들러(threadpool) + 청크 스트리밍: 파일 전체를 메모리에 올리지 않음
     ext = os.path.splitext(f.filename or "")[-1].lower()
-    if ext not in [".csv", ".xlsx", ".parquet"]:
+    if ext not in ALLOWED_EXTS:
         raise HTTPException(status_code=400, detail="Only .csv, .xlsx, .parquet allowed")
 
-    save_path = os.path.join(ARTIFACT_ROOT, "datasets", f"{uuid4().hex}{ext}")
-    with open(save_path, "wb") as out:
-        out.write(await f.read())
+    info = save_stream(iter_file_chunks(f.file), ext)
+    save_path = info["path"]
+    schedule_ingest(save_path)  # 백그라운드 Parquet sidecar 변환
 
     # 원본 파일명 포함
-    return {"dataset_uri": f"file://{save_path}", "original_name": (f.filename or os.path.basename(save_path))}
+    return {
+        "dataset_uri": f"file://{save_path}",
+        "original_name": (f.filename or os.path.basename(save_path)),
+        "dataset_id": info["digest"],
+        "digest": info["digest"],
+        "deduplicated": info["deduplicated"],
+        "bytes_written": info["bytes_written"],
+        "elapsed_ms": info["elapsed_ms"],
+        "ingest_state": ingest_status(save_path)["state"],
+    }
+
+# -------------------------------------------------------------------
+# Upload sessions (재개 가능한 청크 업로드: init → PUT chunk N → complete)
+# -------------------------------------------------------------------
+@router.post("/uploads")
+def create_upload_session(body: dict, authorization: str | None = Header(None)):
+    filename = (body.get("filename") or "").strip()
+    try:
+        meta = upload_sessions.init_session(filename, int(body.get("size") or 0))
+    except upload_sessions.UploadSessionError as e:
+        raise HTTPException(400, str(e))
+    return {k: meta[k] for k in ("upload_id", "chunk_size", "total_chunks", "size")}
+
+@router.get("/uploads/{upload_id}")
+def get_upload_session(upload_id: str, authorization: str | None = Header(None)):
+    try:
+        st = upload_sessions.session_status(upload_id)
+    except upload_sessions.UploadSessionError as e:
+        raise HTTPException(400, str(e))
+    if not st:
+        raise HTTPException(404, "upload session not found")
+    return st
+
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(upload_id: str, index: int, request: Request, authorization: str | None = Header(None)):
+    try:
+        return await upload_sessions.write_chunk(upload_id, index, request.stream())
+    except KeyError:
+        raise HTTPException(404, "upload session not found")
+    except upload_sessions.UploadSessionError as e:
+        raise HTTPException(400, str(e))
+
+@router.post("/uploads/{upload_id}/complete")
+def complete_upload_session(upload_id: str, authorization: str | None = Header(None)):
+    try:
+        info = upload_sessions.finalize_session(upload_id)
+    except KeyError:
+        raise HTTPException(404, "upload session not found")
+    except upload_sessions.UploadSessionError as e:
+        raise HTTPException(409, str(e))
+    schedule_ingest(info["path"])
+    return {
+        "dataset_uri": f"file://{info['path']}",
+        "original_name": info["filename"] or os.path.basename(info["path"]),
+        "dataset_id": info["digest"],
+        "digest": info["digest"],
+        "deduplicated": info["deduplicated"],
+        "bytes_written": info["bytes_written"],
+        "elapsed_ms": info["elapsed_ms"],
+        "ingest_state": ingest_status(info["path"])["state"],
+    }
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload_session(upload_id: str, authorization: str | None = Header(None)):
+    try:
+        return {"ok": upload_sessions.abort_session(upload_id)}
+    except upload_sessions.UploadSessionError as e:
+        raise HTTPException(400, str(e))
 
 # -------------------------------------------------------------------
 # Preview
@@ -64,11 +140,64 @@ def preview(body: dict, authorization: str | None = Header(None)):
     uri = (body.get("dataset_uri") or "").strip()
     if not uri:
         raise HTTPException(400, "dataset_uri required")
-    df = load_dataset(uri)
-    cols = [str(c) for c in df.columns.tolist()]
-    rows = [[(None if (isinstance(v, float) and (v != v)) else (v.item() if hasattr(v, "item") else v))
-             for v in r] for r in df.head(int(body.get("limit", 50))).values.tolist()]
-    return {"columns": cols, "rows": rows}
+    limit = int(body.get("limit", 50))
+    return FastJSONResponse(df_preview_safe(load_preview(uri, limit), limit))
+
+# -------------------------------------------------------------------
+# Dataset schema (컬럼/dtype/행 수; ingest 시 1회 계산 후 캐시)
+# -------------------------------------------------------------------
+def _dataset_path(dataset_id: str) -> str:
+    p = resolve_dataset_id(dataset_id)
+    if not p:
+        raise HTTPException(404, "dataset not found")
+    return p
+
+@router.get("/datasets/cache/stats")
+def dataset_cache_stats(authorization: str | None = Header(None)):
+    return cache_stats()
+
+@router.get("/datasets/{dataset_id}/status")
+def dataset_status(dataset_id: str, authorization: str | None = Header(None)):
+    # 백그라운드 변환(CSV/XLSX → Parquet) 상태/진행률
+    return {"dataset_id": dataset_id, **ingest_status(_dataset_path(dataset_id))}
+
+@router.get("/datasets/{dataset_id}/schema")
+def dataset_schema(dataset_id: str, authorization: str | None = Header(None)):
+    return {"dataset_id": dataset_id, **get_schema(_dataset_path(dataset_id))}
+
+@router.post("/datasets/{dataset_id}/rows")
+def dataset_rows(dataset_id: str, body: dict, authorization: str | None = Header(None)):
+    """
+    서버 측 페이지 조회: {offset, limit, columns?, sort_by?, descending?, filters?}
+    """
+    path = _dataset_path(dataset_id)
+    offset = int(body.get("offset") or 0)
+    limit = min(int(body.get("limit") or 100), 5000)
+    try:
+        df, total = read_window(
+            f"file://{path}", offset=offset, limit=limit,
+            columns=body.get("columns") or None,
+            sort_by=body.get("sort_by") or None,
+            descending=bool(body.get("descending", False)),
+            filters=body.get("filters") or None,
+        )
+    except (KeyError, ValueError, TypeError, NotImplementedError) as e:
+        raise HTTPException(400, f"invalid window request: {e}")
+    return FastJSONResponse({**df_preview_safe(df, limit), "offset": offset, "limit": limit, "total_rows": total})
+
+@router.get("/datasets/{dataset_id}/profile")
+def dataset_profile(dataset_id: str, authorization: str | None = Header(None)):
+    # 저장된 프로파일이 없으면(ingest 중/원본 변경) 백그라운드 계산 예약 후 202
+    path = _dataset_path(dataset_id)
+    prof = get_profile(path)
+    if prof is None:
+        schedule_profile(path)
+        return JSONResponse({"dataset_id": dataset_id, "state": "pending"}, status_code=202)
+    return FastJSONResponse({"dataset_id": dataset_id, "state": "ready", **prof})
+
+@router.post("/datasets/{dataset_id}/profile")
+def refresh_dataset_profile(dataset_id: str, authorization: str | None = Header(None)):
+    return {"dataset_id": dataset_id, "scheduled": schedule_profile(_dataset_path(dataset_id))}
 
 # -------------------------------------------------------------------
 # Projects
@@ -131,6 +260,7 @@ def create_task(body: dict, s: Session = Depends(get_session), authorization: st
     model_params = body.get("model_params") or {}
     features = body.get("features")
     sampling = body.get("sampling")
+    filters = body.get("filters")
 
     if not (analysis_id and task_type and target):
         raise HTTPException(400, "analysis_id, task_type, target required")
@@ -139,6 +269,9 @@ def create_task(body: dict, s: Session = Depends(get_session), authorization: st
         model_params = {**model_params, "_features": features}
     if sampling:
         model_params = {**model_params, "_sampling": sampling}
+    if filters:
+        # [[col, op, value], ...] 파티션/행 필터 (예: [["month", "==", "2024-01"]])
+        model_params = {**model_params, "_filters": filters}
 
     return Repo(s).create_task(
         analysis_id=analysis_id,
@@ -152,21 +285,29 @@ def create_task(body: dict, s: Session = Depends(get_session), authorization: st
 # -------------------------------------------------------------------
 # Train (enqueue job to Mongo)
 # -------------------------------------------------------------------
-@router.post("/tasks/{task_id}/train")
-def train_task(task_id: str, body: dict, s: Session = Depends(get_session), authorization: str | None = Header(None)):
-    repo = Repo(s)
-    task = repo.get_task(task_id)
-    if not task:
-        raise HTTPException(404, "task not found")
+def _request_user_id(request: Request) -> str | None:
+    # AuthMiddleware 가 있으면 request.state.user, 없으면 Bearer 토큰 직접 확인
+    user = getattr(request.state, "user", None) or {}
+    if user.get("user_id"):
+        return user["user_id"]
+    payload = decode_token_optional(request)
+    return payload.sub if payload else None
 
-    analysis = repo.get_analysis(task.analysis_id)
-    if not analysis:
-        raise HTTPException(404, "analysis not found")
+def _job_priority(body: dict) -> int:
+    # priority 는 0..JOB_MAX_PRIORITY 만 허용 (임의의 큰 값으로 공정 분배 큐를 앞지르지 못하도록)
+    raw = (body or {}).get("priority") or 0
+    try:
+        prio = int(raw)
+    except (TypeError, ValueError):
+        raise HTTPException(400, "priority must be an integer")
+    if not (0 <= prio <= int(settings.JOB_MAX_PRIORITY)):
+        raise HTTPException(400, f"priority must be between 0 and {int(settings.JOB_MAX_PRIORITY)}")
+    return prio
 
+def _job_payload(task, analysis, user_id: str | None, body: dict) -> dict:
     dataset_original_name = getattr(analysis, "dataset_original_name", None) or \
                             getattr(analysis, "dataset_orinial_name", None) or None
-
-    job_id = create_job({
+    return {
         "task_ref": {
             "task_id": task.id,
             "task_type": task.task_type,
@@ -178,18 +319,105 @@ def train_task(task_id: str, body: dict, s: Session = Depends(get_session), auth
         "dataset_uri": analysis.dataset_uri,
         "dataset_original_name": dataset_original_name,
         "mlflow_uri": MLFLOW_URI,
-    })
+        "user_id": user_id,
+        "priority": _job_priority(body),
+    }
+
+@router.post("/tasks/train")
+def train_tasks(body: dict, request: Request, s: Session = Depends(get_session),
+                authorization: str | None = Header(None)):
+    """
+    여러 태스크 일괄 큐잉: {"task_ids": [...], "force": bool, "priority": int(0..JOB_MAX_PRIORITY), "idempotency_key": str}
+    idempotency_key 는 태스크별 "<key>:<task_id>" 로 적용. 태스크/분석 조회는 IN 쿼리 각 1회, insert 는 insert_many 1회.
+    응답 {"runs": {task_id: run_id}, "errors": {task_id: 메시지}} (없는 태스크/한도 초과는 errors)
+    """
+    task_ids = [t for t in dict.fromkeys((body or {}).get("task_ids") or []) if t]
+    if not task_ids:
+        raise HTTPException(400, "task_ids required")
+    _job_priority(body)  # 범위 밖이면 조회 전에 400
+    repo = Repo(s)
+    tasks = repo.get_tasks(task_ids)
+    analyses = repo.get_analyses([t.analysis_id for t in tasks.values()])
+    user_id = _request_user_id(request)
+    key = (body or {}).get("idempotency_key")
+
+    errors: dict = {}
+    items, item_tasks = [], []
+    for tid in task_ids:
+        task = tasks.get(tid)
+        analysis = analyses.get(task.analysis_id) if task else None
+        if not task:
+            errors[tid] = "task not found"
+        elif not analysis:
+            errors[tid] = "analysis not found"
+        else:
+            items.append({
+                "payload": _job_payload(task, analysis, user_id, body),
+                "idempotency_key": f"{key}:{tid}" if key else None,
+            })
+            item_tasks.append(tid)
+
+    res = create_jobs_idempotent(items, force=bool((body or {}).get("force")))
+    runs = {tid: rid for tid, rid in zip(item_tasks, res["run_ids"]) if rid}
+    errors.update({item_tasks[i]: msg for i, msg in res["errors"].items()})
+    return {"runs": runs, "errors": errors}
+
+@router.post("/tasks/{task_id}/train")
+def train_task(task_id: str, body: dict, request: Request, s: Session = Depends(get_session),
+               authorization: str | None = Header(None)):
+    repo = Repo(s)
+    task = repo.get_task(task_id)
+    if not task:
+        raise HTTPException(404, "task not found")
+
+    analysis = repo.get_analysis(task.analysis_id)
+    if not analysis:
+        raise HTTPException(404, "analysis not found")
+
+    # force=False: 이 태스크의 활성 run 이 있으면 그 run_id (더블클릭/재시도에도 중복 학습 없음)
+    # idempotency_key: 같은 key 는 항상 같은 run_id
+    try:
+        job_id = create_job_idempotent(
+            _job_payload(task, analysis, _request_user_id(request), body),
+            idempotency_key=(body or {}).get("idempotency_key") or None,
+            force=bool((body or {}).get("force")),
+        )
+    except QuotaExceeded as e:
+        raise HTTPException(429, str(e))
     return {"run_id": job_id}
 
 # -------------------------------------------------------------------
 # Runs
 # -------------------------------------------------------------------
-@router.get("/runs/{run_id}")
-def get_run(run_id: str, authorization: str | None = Header(None)):
-    j = get_job(run_id)
-    if not j:
-        raise HTTPException(404, "run not found")
-    return {
+@router.get("/runs/stream")
+async def stream_runs(ids: str, request: Request, authorization: str | None = Header(None)):
+    # SSE: snapshot → status(변경분) … → end. /runs/{run_id} 보다 먼저 등록해야 함
+    run_ids = [x for x in dict.fromkeys(i.strip() for i in ids.split(",")) if x]
+    if not run_ids:
+        raise HTTPException(400, "ids required")
+    if len(run_ids) > MAX_STREAM_IDS:
+        raise HTTPException(400, f"too many ids (max {MAX_STREAM_IDS})")
+    return StreamingResponse(
+        stream_run_events(request, run_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# 응답 필드 → Mongo projection 경로
+_RUN_FIELDS = {
+    "status": "status",
+    "progress": "progress",
+    "message": "message",
+    "metrics": "metrics",
+    "artifacts": "artifacts",
+    "mlflow": "mlflow",
+    "task_ref": "task_ref",
+    "dataset_original_name": "dataset_original_name",
+    "analysis_id": "task_ref.analysis_id",
+}
+
+def _run_view(run_id: str, j: dict, fields: list[str] | None = None) -> dict:
+    view = {
         "id": run_id,
         "status": j.get("status"),
         "progress": j.get("progress", 0.0),
@@ -201,15 +429,41 @@ def get_run(run_id: str, authorization: str | None = Header(None)):
         "dataset_original_name": j.get("dataset_original_name"),
         "analysis_id": j.get("task_ref", {}).get("analysis_id"),
     }
+    if fields:
+        view = {k: v for k, v in view.items() if k == "id" or k in fields}
+    return view
+
+@router.get("/runs")
+def list_runs(ids: str, fields: str | None = None, authorization: str | None = Header(None)):
+    """
+    여러 run 상태를 한 번에: ?ids=a,b,c&fields=status,progress,message
+    Mongo $in 1회 + projection(fields 만). 응답 {"runs": {run_id: {...}}, "missing": [없는 id]}
+    """
+    run_ids = [x for x in dict.fromkeys(i.strip() for i in ids.split(",")) if x]
+    if len(run_ids) > MAX_STREAM_IDS:
+        raise HTTPException(400, f"too many ids (max {MAX_STREAM_IDS})")
+    want = [f for f in dict.fromkeys(x.strip() for x in (fields or "").split(",")) if f] or None
+    unknown = [f for f in want or [] if f not in _RUN_FIELDS]
+    if unknown:
+        raise HTTPException(400, f"unknown fields: {', '.join(unknown)}")
+    docs = get_jobs(run_ids, [_RUN_FIELDS[f] for f in want] if want else None)
+    runs = {str(j["_id"]): _run_view(str(j["_id"]), j, want) for j in docs}
+    return {"runs": runs, "missing": [r for r in run_ids if r not in runs]}
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: str, authorization: str | None = Header(None)):
+    j = get_job(run_id)
+    if not j:
+        raise HTTPException(404, "run not found")
+    return _run_view(run_id, j)
 
 @router.post("/runs/{run_id}/cancel")
 def cancel_run(run_id: str, authorization: str | None = Header(None)):
     j = get_job(run_id)
     if not j:
         raise HTTPException(404, "run not found")
-    from .queue_mongo import _jobs
-    _jobs.update_one({"_id": j["_id"]}, {"$set": {"cancel_requested": True, "message": "cancel requested"}})
-    return {"ok": True}
+    # queued 는 즉시 canceled, running 은 워커가 다음 단계에서 중단
+    return {"ok": cancel_job(run_id)}
 
 # -------------------------------------------------------------------
 # Artifact proxy (MLflow 파일 모드)
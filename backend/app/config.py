@@ -32,15 +32,44 @@ class Settings(BaseSettings):
     ARTIFACT_ROOT: str = r"Z:\vml_artifacts"
     MLFLOW_URI: str = r"file:Z:\mlflow"
 
+    # Datasets / Upload
+    UPLOAD_CHUNK_BYTES: int = 8 * 1024 * 1024  # 업로드 스트리밍 청크 크기
+    UPLOAD_SESSION_TTL_HOURS: int = 24         # 미완료 업로드 세션 보존 시간
+    INGEST_WORKERS: int = 2                    # CSV/XLSX → Parquet sidecar 변환 스레드 수
+    DATAFRAME_CACHE_BYTES: int = 1024 * 1024 * 1024  # load_dataset 프로세스 내 캐시 예산 (0 = 비활성)
+    CSV_READER_BACKEND: str = "arrow"         # CSV 파서: arrow(멀티스레드) | pandas
+    CSV_BLOCK_SIZE: int = 16 * 1024 * 1024     # arrow CSV 블록 크기 (스레드별 병렬 파싱 단위)
+    CSV_THREADS: int = 0                       # arrow CPU 스레드 수 (0 = 코어 수 자동)
+
     # Auth / JWT
     JWT_SECRET: str = "change-me"
     JWT_ALG: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # 토큰 자체 만료
     INACTIVITY_MINUTES: int = 10          # 비활성 최대 시간(프론트 + 토큰 TTL)
 
+    # Worker (python -m app.worker)
+    WORKER_CONCURRENCY: int = 2          # 워커 프로세스당 동시 실행 잡 수 (프로세스 풀 크기)
+    WORKER_LEASE_SECONDS: int = 120      # 클레임 lease 길이 (heartbeat 로 연장)
+    WORKER_HEARTBEAT_SECONDS: int = 20   # heartbeat 주기 (lease 보다 충분히 짧게)
+    WORKER_POLL_SECONDS: float = 2.0     # 대기 잡이 없을 때 재시도 간격
+    JOB_MAX_ATTEMPTS: int = 3            # lease 만료로 재큐잉 허용 횟수(초과 시 failed)
+    JOB_RETRY_BACKOFF_SECONDS: int = 30  # 재큐잉 대기 = backoff × 2^(attempts-1)
+    SWEEP_INTERVAL_SECONDS: int = 30     # 만료 lease 스위퍼 주기
+    RECONCILE_INTERVAL_SECONDS: int = 300  # 활성 잡 카운터 ↔ jobs 컬렉션 재조정 주기
+    PROGRESS_FLUSH_MS: int = 1000        # 진행률/메시지 쓰기 병합 주기 (상태 변경/종료는 즉시)
+    JOB_MAX_PRIORITY: int = 10           # 클라이언트가 지정할 수 있는 priority 상한 (0..상한, 클수록 먼저)
+
+    # Run status push (GET /runs/stream)
+    RUN_EVENTS_POLL_SECONDS: float = 1.0      # change stream 미지원(standalone mongod) 시 폴링 주기
+    RUN_STREAM_KEEPALIVE_SECONDS: int = 15    # SSE keep-alive 주석 전송 간격 (프록시 idle timeout 방지)
+
     # Quotas
     MAX_ACTIVE_RUNS_GLOBAL: int = 20
     MAX_ACTIVE_RUNS_PER_USER: int = 5
     RESERVED_CPUS: int = 4  # 워커 CPU 여유 예약(지표)
 
 settings = Settings()
+
+# 모듈 레벨 별칭 (api.py 등에서 직접 import)
+ARTIFACT_ROOT = settings.ARTIFACT_ROOT
+MLFLOW_URI = settings.MLFLOW_URI
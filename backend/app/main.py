@@ -8,7 +8,7 @@ from app.config import settings
 from app.db import create_db_and_tables
 from app.api import router
 from app.ui.app import build_dash_app
-from app.queue_mongo import ensure_indexes
+from app.queue_mongo import ensure_indexes, reconcile_counters
 
 app = FastAPI(
     title="Visual ML",
@@ -32,4 +32,5 @@ app.mount("/", WSGIMiddleware(dash_app.server))
 @app.on_event("startup")
 def _init():
     create_db_and_tables()
-    ensure_indexes()
\ No newline at end of file
+    ensure_indexes()
+    reconcile_counters()  # 활성 잡 카운터 초기화/보정
@@ -1,10 +1,11 @@
 # backend/app/queue_mongo.py
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from bson import ObjectId
 
 from .config import settings
@@ -15,6 +16,15 @@ from .config import settings
 _client = MongoClient(settings.MONGO_URI)
 _db = _client[settings.MONGO_DB]
 _jobs = _db[settings.MONGO_COLLECTION]  # 기본값 "jobs"
+_counters = _db[f"{settings.MONGO_COLLECTION}_counters"]  # 큐 카운터 (활성 수, 사용자별 running/claimed, 스위퍼 복구 건수)
+
+ACTIVE_STATUSES = ("queued", "delayed", "running")  # delayed = 재큐잉 backoff 대기 (not_before 이후 queued)
+TERMINAL_STATUSES = ("succeeded", "failed", "canceled")
+_GLOBAL_KEY = "active:global"
+
+
+class QuotaExceeded(Exception):
+    pass
 
 # -------------------------------------------------------------------
 # Indexes
@@ -24,9 +34,20 @@ def ensure_indexes() -> None:
     서버 시작 시 1회 호출 권장.
     - 활성 잡 조회(status + task_ref.task_id)
     - idem key 중복 방지(unique, sparse)
+    - active_lock: 태스크당 활성 잡 1개 보장(unique, 값이 있는 문서만) — 종료 전이 시 $unset
+    - 워커 클레임: 최고 priority → 해당 priority 의 user_id 목록(distinct) → 사용자별 가장 오래된 잡
+      (status, priority, user_id, created_at) 하나로 세 단계 모두 인덱스만 탐색(조건이 모두 이 필드들)
+    - 스위퍼(status=running 중 lease 만료), backoff 끝난 delayed 잡 승격(status=delayed + not_before)
     """
     _jobs.create_index([("status", ASCENDING), ("task_ref.task_id", ASCENDING)])
     _jobs.create_index([("idempotency_key", ASCENDING)], unique=True, sparse=True)
+    _jobs.create_index([("active_lock", ASCENDING)], unique=True,
+                       partialFilterExpression={"active_lock": {"$type": "string"}})
+    _jobs.create_index([
+        ("status", ASCENDING), ("priority", DESCENDING), ("user_id", ASCENDING), ("created_at", ASCENDING),
+    ])
+    _jobs.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+    _jobs.create_index([("status", ASCENDING), ("not_before", ASCENDING)])
 
 
 # -------------------------------------------------------------------
@@ -36,27 +57,118 @@ def _oid(s: str) -> ObjectId:
     return ObjectId(s)
 
 
+def _user_key(user_id: Optional[str]) -> str:
+    return f"user:{user_id}"
+
+
+def _reserve(key: str, field: str, limit: Optional[int], n: int = 1) -> bool:
+    """
+    카운터 문서 key 의 field 를 +n 한 값이 limit 이하일 때만 +n (원자적, limit=None 이면 무조건).
+    문서가 이미 limit - n 초과면 upsert 가 같은 _id 로 insert 를 시도 → DuplicateKeyError.
+    DuplicateKeyError 는 새 key 의 첫 upsert 끼리 경합해 진 경우에도 나므로(자리는 남음)
+    upsert 없이 조건부 갱신을 한 번 더 해보고, 그래도 안 맞으면 자리 없음.
+    """
+    flt: Dict[str, Any] = {"_id": key}
+    if limit is not None:
+        if n > int(limit):
+            return False
+        flt["$or"] = [{field: {"$lte": int(limit) - n}}, {field: {"$exists": False}}]
+    try:
+        _counters.find_one_and_update(flt, {"$inc": {field: n}}, upsert=True)
+        return True
+    except DuplicateKeyError:
+        return _counters.find_one_and_update(flt, {"$inc": {field: n}}) is not None
+
+
+def _reserve_many(key: str, field: str, n: int, limit: Optional[int]) -> int:
+    """최대 n 자리 예약(남은 자리만큼), 예약한 수 반환. 경합으로 남은 자리가 바뀌면 다시 읽고 재시도"""
+    while n > 0:
+        k = n
+        if limit is not None:
+            cur = int((_counters.find_one({"_id": key}, projection={field: 1}) or {}).get(field) or 0)
+            k = min(n, int(limit) - cur)
+        if k <= 0:
+            return 0
+        if _reserve(key, field, limit, k):
+            return k
+    return 0
+
+
+def _release(key: str, field: str, n: int = 1) -> None:
+    if n > 0:
+        _counters.update_one({"_id": key, field: {"$gte": n}}, {"$inc": {field: -n}})
+
+
+def _release_active(user_id: Optional[str]) -> None:
+    # 활성(queued/delayed/running) → 종료 전이 시
+    _release(_GLOBAL_KEY, "active")
+    _release(_user_key(user_id), "active")
+
+
+def _user_limit(user_id: Optional[str], limit: Optional[int]) -> Optional[int]:
+    # 사용자 식별이 안 된 잡(user_id=None)은 사용자별 한도 없음 — 모두 같은 "user:None" 이라 전역 한도가 돼버림
+    return None if user_id is None or limit is None else int(limit)
+
+
+def _reserve_active(doc: Dict[str, Any], enforce_quota: bool) -> bool:
+    """
+    활성 상태로 넣을 잡이면 전역/사용자 활성 카운터를 예약(True). 그 외 상태는 예약 없음(False).
+    enforce_quota=True 면 MAX_ACTIVE_RUNS_GLOBAL / MAX_ACTIVE_RUNS_PER_USER 초과 시 QuotaExceeded (경합 없이).
+    user_id 가 없는 잡은 전역 한도만 적용.
+    """
+    if doc.get("status") not in ACTIVE_STATUSES:
+        return False
+    g_limit = int(settings.MAX_ACTIVE_RUNS_GLOBAL) if enforce_quota else None
+    u_limit = _user_limit(doc.get("user_id"), settings.MAX_ACTIVE_RUNS_PER_USER if enforce_quota else None)
+    if not _reserve(_GLOBAL_KEY, "active", g_limit):
+        raise QuotaExceeded(f"global active runs limit reached ({g_limit})")
+    if not _reserve(_user_key(doc.get("user_id")), "active", u_limit):
+        _release(_GLOBAL_KEY, "active")
+        raise QuotaExceeded(f"user active runs limit reached ({u_limit})")
+    return True
+
+
+def _insert_job(doc: Dict[str, Any], enforce_quota: bool) -> str:
+    """활성 카운터 예약(_reserve_active) → insert. 실패 시 예약 반환"""
+    reserved = _reserve_active(doc, enforce_quota)
+    try:
+        return str(_jobs.insert_one(doc).inserted_id)
+    except BaseException:
+        if reserved:
+            _release_active(doc.get("user_id"))
+        raise
+
+
 # -------------------------------------------------------------------
 # Basic queue API (compat)
 # -------------------------------------------------------------------
-def create_job(payload: Dict[str, Any]) -> str:
-    """
-    가장 단순한 큐잉: 활성 중복 체크 없이 무조건 insert.
-    필요한 기본 필드 보강.
-    """
+def _new_job_doc(payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+    """기본 필드를 보강한 신규 잡 문서"""
     now = datetime.utcnow()
     doc = {
         **(payload or {}),
         "status": (payload.get("status") if payload and payload.get("status") else "queued"),
         "worker_id": (payload.get("worker_id") if payload else None),
+        "priority": int(payload.get("priority") or 0) if payload else 0,  # 클수록 먼저
+        "user_id": (payload.get("user_id") if payload else None),
         "progress": float(payload.get("progress", 0.0)) if payload else 0.0,
         "message": (payload.get("message") if payload else "") or "",
         "cancel_requested": bool(payload.get("cancel_requested", False)) if payload else False,
         "created_at": now,
         "updated_at": now,
     }
-    ins = _jobs.insert_one(doc)
-    return str(ins.inserted_id)
+    if idempotency_key:
+        # 키가 없는 잡에는 필드 자체를 두지 않음 (null 도 unique 인덱스에 들어가 서로 충돌)
+        doc["idempotency_key"] = idempotency_key
+    return doc
+
+
+def create_job(payload: Dict[str, Any], enforce_quota: bool = True) -> str:
+    """
+    가장 단순한 큐잉: 활성 중복 체크 없이 insert.
+    필요한 기본 필드 보강. 활성 한도 초과 시 QuotaExceeded.
+    """
+    return _insert_job(_new_job_doc(payload), enforce_quota)
 
 
 def get_job(job_id: str) -> Optional[Dict[str, Any]]:
@@ -66,62 +178,532 @@ def get_job(job_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def get_jobs(job_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """여러 잡을 $in 1회로 조회. fields 지정 시 해당 필드만(projection). 잘못된/없는 id 는 결과에서 빠짐"""
+    oids = [_oid(x) for x in job_ids if ObjectId.is_valid(x)]
+    if not oids:
+        return []
+    projection = {f: 1 for f in fields} if fields else None
+    return list(_jobs.find({"_id": {"$in": oids}}, projection=projection))
+
+
 def set_job_fields(job_id: str, fields: Dict[str, Any]) -> None:
     fields = dict(fields or {})
     fields["updated_at"] = datetime.utcnow()
     _jobs.update_one({"_id": _oid(job_id)}, {"$set": fields})
 
 
+def bulk_set_job_fields(updates: Dict[str, Dict[str, Any]]) -> int:
+    """
+    여러 잡의 필드 갱신을 bulk_write 1회로 (ProgressReporter flush 용).
+    이미 종료 상태인 잡은 건드리지 않음(늦게 도착한 진행률이 최종 결과를 덮지 않도록). 반영된 잡 수 반환.
+    """
+    if not updates:
+        return 0
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne({"_id": _oid(job_id), "status": {"$nin": list(TERMINAL_STATUSES)}},
+                  {"$set": {**fields, "updated_at": now}})
+        for job_id, fields in updates.items()
+    ]
+    return _jobs.bulk_write(ops, ordered=False).modified_count
+
+
 # -------------------------------------------------------------------
 # Advanced (idempotency + active-run guard)
 # -------------------------------------------------------------------
 def get_active_job_by_task(task_id: str) -> Optional[Dict[str, Any]]:
     """
-    해당 task_id로 '진행 중'인(queued/running) 잡이 있는지 반환.
+    해당 task_id로 '진행 중'인(queued/delayed/running) 잡이 있는지 반환.
     cancel_requested=True 인지는 무시(=여전히 running일 수 있으니 워커에서 중단될 때까지 active).
     """
     return _jobs.find_one({
         "task_ref.task_id": task_id,
-        "status": {"$in": ["queued", "running"]},
+        "status": {"$in": list(ACTIVE_STATUSES)},
     })
 
 
+def _existing_job_id(idempotency_key: Optional[str], task_id: Optional[str], force: bool) -> Optional[str]:
+    # 같은 key 로 만든 잡 → (force 가 아니면) 같은 task 의 활성 잡
+    if idempotency_key:
+        prev = _jobs.find_one({"idempotency_key": idempotency_key}, projection={"_id": 1})
+        if prev:
+            return str(prev["_id"])
+    if not force and task_id:
+        active = get_active_job_by_task(task_id)
+        if active:
+            return str(active["_id"])
+    return None
+
+
 def create_job_idempotent(
     payload: Dict[str, Any],
     idempotency_key: Optional[str] = None,
     force: bool = False,
+    enforce_quota: bool = True,
 ) -> str:
     """
-    - force=False: 같은 task_id의 활성(queued/running) 잡이 있으면 그 run_id 반환(새로 안만듦).
+    - force=False: 같은 task_id의 활성(queued/delayed/running) 잡이 있으면 그 run_id 반환(새로 안만듦).
     - idempotency_key 지정 시, 같은 key는 항상 같은 run_id 반환(unique index).
     - force=True: 활성 잡이 있더라도 무시하고 새로 생성.
+    동시 요청에도 중복 생성 없음:
+    - key: {idempotency_key} 조건 upsert($setOnInsert) → 이미 있으면 기존 문서, 동시 upsert 가 겹치면
+      unique 인덱스의 DuplicateKeyError → 먼저 생긴 잡 반환
+    - force=False 잡은 active_lock=task_id 를 가짐(unique) → 같은 task 의 두 번째 활성 잡 insert 는
+      DuplicateKeyError → 먼저 생긴 활성 잡 반환. 종료 전이에서 lock 해제
+    새로 만들지 않은 경우 예약한 활성 카운터는 바로 반환.
     """
-    # 1) task_id 기반 활성 중복 방지 (force가 아닌 경우만)
-    task_ref = (payload or {}).get("task_ref") or {}
-    task_id = task_ref.get("task_id")
-    if not force and task_id:
-        active = get_active_job_by_task(task_id)
-        if active:
-            return str(active["_id"])
+    task_id = ((payload or {}).get("task_ref") or {}).get("task_id")
+    for _ in range(3):
+        # 1) 빠른 경로: 이미 있는 잡 (대부분의 재시도/더블클릭)
+        existing = _existing_job_id(idempotency_key, task_id, force)
+        if existing:
+            return existing
 
-    # 2) idempotency_key 기반 멱등
-    if idempotency_key:
-        prev = _jobs.find_one({"idempotency_key": idempotency_key})
-        if prev:
-            return str(prev["_id"])
+        # 2) 신규: 카운터 예약 → 원자적 생성
+        doc = _new_job_doc(payload, idempotency_key)
+        doc["_id"] = ObjectId()
+        if not force and task_id:
+            doc["active_lock"] = task_id
+        reserved = _reserve_active(doc, enforce_quota)
+        try:
+            if idempotency_key:
+                on_insert = {k: v for k, v in doc.items() if k != "idempotency_key"}
+                prev = _jobs.find_one_and_update(
+                    {"idempotency_key": idempotency_key}, {"$setOnInsert": on_insert},
+                    upsert=True, projection={"_id": 1},
+                )
+                inserted = prev is None  # 반환값 = 갱신 전 문서, None 이면 이번에 생성
+            else:
+                _jobs.insert_one(doc)
+                inserted = True
+        except DuplicateKeyError:
+            inserted = False
+        except BaseException:
+            if reserved:
+                _release_active(doc.get("user_id"))
+            raise
+        if inserted:
+            return str(doc["_id"])
+        if reserved:
+            _release_active(doc.get("user_id"))
+        # 경합에서 짐 → 이긴 잡 반환 (그 사이 종료돼 lock 이 풀렸으면 다시 시도)
+        existing = _existing_job_id(idempotency_key, task_id, force)
+        if existing:
+            return existing
+    raise RuntimeError("could not enqueue job (concurrent updates)")
+
+
+def create_jobs_idempotent(
+    items: List[Dict[str, Any]],
+    force: bool = False,
+    enforce_quota: bool = True,
+) -> Dict[str, Any]:
+    """
+    create_job_idempotent 의 일괄 버전. items = [{"payload": {...}, "idempotency_key": str | None}, ...]
+    잡마다 같은 규칙(활성 잡 재사용 / 같은 key 는 같은 run_id)을 적용하되 조회·예약·insert 를 묶어서:
+    활성 잡 $in 1회 + idem key $in 1회 + 카운터 예약(전역 1회, 사용자별 1회) + insert_many 1회.
+    반환: {"run_ids": [item 순서, 실패는 None], "errors": {index: 메시지}}  (run_id 가 None 인 item 은 모두 errors 에)
+    """
+    run_ids: List[Optional[str]] = [None] * len(items)
+    errors: Dict[int, str] = {}
+
+    # 1) idempotency_key 로 이미 만든 잡
+    task_ids = [((it.get("payload") or {}).get("task_ref") or {}).get("task_id") for it in items]
+    keys = {i: it.get("idempotency_key") for i, it in enumerate(items) if it.get("idempotency_key")}
+    if keys:
+        prev = {j["idempotency_key"]: str(j["_id"])
+                for j in _jobs.find({"idempotency_key": {"$in": list(keys.values())}}, projection={"idempotency_key": 1})}
+        for i, k in keys.items():
+            if k in prev:
+                run_ids[i] = prev[k]
+
+    # 2) 같은 task 의 활성 잡 재사용 (force 가 아니면)
+    if not force and any(t for i, t in enumerate(task_ids) if run_ids[i] is None):
+        active: Dict[str, str] = {}
+        for j in _jobs.find(
+            {"task_ref.task_id": {"$in": [t for t in task_ids if t]}, "status": {"$in": list(ACTIVE_STATUSES)}},
+            projection={"task_ref.task_id": 1},
+        ):
+            active.setdefault(j["task_ref"]["task_id"], str(j["_id"]))
+        for i, t in enumerate(task_ids):
+            if run_ids[i] is None and t in active:
+                run_ids[i] = active[t]
+
+    # 3) 신규: 배치 안의 같은 key 는 1개만 생성
+    todo: Dict[int, List[int]] = {}  # 생성할 문서 대표 index → 같은 key 를 쓰는 index 들
+    by_key: Dict[str, int] = {}
+    for i, it in enumerate(items):
+        if run_ids[i] is not None:
+            continue
+        k = it.get("idempotency_key")
+        if k and k in by_key:
+            todo[by_key[k]].append(i)
+            continue
+        if k:
+            by_key[k] = i
+        todo[i] = [i]
+    docs = [(i, _new_job_doc(items[i].get("payload") or {}, items[i].get("idempotency_key"))) for i in todo]
+    if not force:
+        for i, d in docs:
+            if task_ids[i]:
+                d["active_lock"] = task_ids[i]
+
+    # 4) 활성 카운터 일괄 예약 (남은 자리만큼, 넘치는 잡은 QuotaExceeded 메시지)
+    active_docs = [(i, d) for i, d in docs if d.get("status") in ACTIVE_STATUSES]
+    if active_docs:
+        g_limit = int(settings.MAX_ACTIVE_RUNS_GLOBAL) if enforce_quota else None
+        u_max = int(settings.MAX_ACTIVE_RUNS_PER_USER) if enforce_quota else None
+        g_left = _reserve_many(_GLOBAL_KEY, "active", len(active_docs), g_limit)
+        by_user: Dict[Any, List[int]] = {}
+        for i, d in active_docs:
+            by_user.setdefault(d.get("user_id"), []).append(i)
+        rejected: Dict[int, str] = {}
+        for user_id, idxs in by_user.items():
+            want = min(len(idxs), g_left)
+            u_limit = _user_limit(user_id, u_max)
+            got = _reserve_many(_user_key(user_id), "active", want, u_limit) if want else 0
+            g_left -= got
+            # want 안에서 못 받은 것 = 사용자 한도, want 밖 = 전역 자리 부족
+            for k, i in enumerate(idxs[got:], start=got):
+                rejected[i] = (f"user active runs limit reached ({u_limit})" if k < want
+                               else f"global active runs limit reached ({g_limit})")
+        _release(_GLOBAL_KEY, "active", g_left)
+        docs = [(i, d) for i, d in docs if i not in rejected]
+        for i, msg in rejected.items():
+            for j in todo[i]:
+                errors[j] = msg
+
+    # 5) insert_many (ordered=False: 동시 요청이 같은 key/같은 task 활성 잡을 먼저 넣었으면 그 잡을 반환)
+    if docs:
+        dup: List[int] = []
+        try:
+            _jobs.insert_many([d for _, d in docs], ordered=False)
+        except BulkWriteError as e:
+            failed = {w["index"]: w for w in e.details.get("writeErrors", [])}
+            if any(w.get("code") != 11000 for w in failed.values()):
+                for n, (_, d) in enumerate(docs):
+                    if n in failed and d.get("status") in ACTIVE_STATUSES:
+                        _release_active(d.get("user_id"))
+                raise
+            dup = sorted(failed)
+        for n, (i, d) in enumerate(docs):
+            if n in dup:
+                if d.get("status") in ACTIVE_STATUSES:
+                    _release_active(d.get("user_id"))
+                rid = _existing_job_id(d.get("idempotency_key"), task_ids[i], force)
+            else:
+                rid = str(d["_id"])
+            for j in todo[i]:
+                if rid:
+                    run_ids[j] = rid
+                else:
+                    # 경합에서 졌는데 이긴 잡이 그 사이 종료됨 → 새로 만들지 않고 재시도를 안내
+                    errors[j] = "concurrent enqueue for this task; retry"
+
+    return {"run_ids": run_ids, "errors": errors}
+
+
+# -------------------------------------------------------------------
+# Worker: 클레임 / lease / heartbeat / 종료 전이
+# -------------------------------------------------------------------
+
+def _reserve_user_slot(user_id: Optional[str], limit: Optional[int]) -> bool:
+    return _reserve(_user_key(user_id), "running", limit)
+
+
+def _release_user_slot(user_id: Optional[str]) -> None:
+    _release(_user_key(user_id), "running")
 
-    # 3) 신규 생성
+
+def promote_delayed_jobs(now: Optional[datetime] = None) -> int:
+    """backoff(not_before)가 끝난 delayed 잡 → queued. (status, not_before) 인덱스 범위 조회라 대상이 없으면 비용 거의 없음"""
+    now = now or datetime.utcnow()
+    return _jobs.update_many(
+        {"status": "delayed", "not_before": {"$lte": now}},
+        {"$set": {"status": "queued", "not_before": None, "updated_at": now}},
+    ).modified_count
+
+
+def claim_job(worker_id: str, lease_seconds: int, max_running_per_user: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    queued 잡 1개를 원자적으로 running 으로 전이(find_one_and_update) 후 반환. 없으면 None.
+    선택 순서: priority 높은 것 → 그 priority 안에서 덜 서비스된 사용자(running 적은 순, 누적 claimed 적은 순)
+    → 그 사용자의 가장 오래된 잡.
+    사용자별 running 이 MAX_ACTIVE_RUNS_PER_USER 이상이면 그 사용자는 건너뜀(카운터 예약으로 경합 없이 보장).
+    user_id 가 없는 잡은 사용자별 한도 없음.
+    backoff 중인 잡은 status=delayed 라 대상이 아님(먼저 not_before 가 지난 것을 queued 로 승격).
+    취소는 queued 를 바로 canceled 로 바꾸므로 cancel_requested 조건 불필요
+    → 모든 조회 조건이 (status, priority, user_id, created_at) 인덱스 안에 있음.
+    """
+    limit = int(max_running_per_user or settings.MAX_ACTIVE_RUNS_PER_USER)
     now = datetime.utcnow()
-    doc = {
-        **(payload or {}),
-        "status": (payload.get("status") if payload and payload.get("status") else "queued"),
-        "worker_id": (payload.get("worker_id") if payload else None),
-        "progress": float(payload.get("progress", 0.0)) if payload else 0.0,
-        "message": (payload.get("message") if payload else "") or "",
-        "idempotency_key": idempotency_key or None,
-        "cancel_requested": bool(payload.get("cancel_requested", False)) if payload else False,
-        "created_at": now,
-        "updated_at": now,
-    }
-    ins = _jobs.insert_one(doc)
-    return str(ins.inserted_id)
\ No newline at end of file
+    promote_delayed_jobs(now)
+    eligible = [{"status": "queued"}]
+    lower: List[Dict[str, Any]] = []  # 이미 본 priority 보다 낮은 것만
+    while True:
+        top = _jobs.find_one({"$and": eligible + lower}, projection={"_id": 0, "priority": 1},
+                             sort=[("status", ASCENDING), ("priority", DESCENDING)])
+        if not top:
+            return None
+        prio = top.get("priority")
+        at_prio = {"status": "queued", "priority": prio}
+        users = _jobs.distinct("user_id", at_prio)  # (status, priority, user_id) 접두 → DISTINCT_SCAN
+        served = {d["_id"]: d for d in _counters.find({"_id": {"$in": [_user_key(u) for u in users]}})}
+
+        def _load(u: Optional[str]) -> tuple:
+            d = served.get(_user_key(u)) or {}
+            return int(d.get("running") or 0), int(d.get("claimed") or 0)
+
+        for u in sorted(users, key=_load):
+            u_limit = _user_limit(u, limit)
+            if (u_limit is not None and _load(u)[0] >= u_limit) or not _reserve_user_slot(u, u_limit):
+                continue
+            job = _jobs.find_one_and_update(
+                {**at_prio, "user_id": u},
+                {
+                    "$set": {
+                        "status": "running",
+                        "worker_id": worker_id,
+                        "started_at": now,
+                        "heartbeat_at": now,
+                        "lease_expires_at": now + timedelta(seconds=int(lease_seconds)),
+                        "not_before": None,
+                        "message": "claimed",
+                        "updated_at": now,
+                    },
+                    "$inc": {"attempts": 1},
+                },
+                sort=[("created_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if job:
+                _counters.update_one({"_id": _user_key(u)}, {"$inc": {"claimed": 1}})
+                return job
+            _release_user_slot(u)  # 그 사이 다른 워커가 가져감
+
+        # 이 priority 는 모두 한도 초과/경합 → 다음 priority
+        if prio is None:
+            return None
+        lower = [{"$or": [{"priority": {"$lt": prio}}, {"priority": None}]}]
+
+
+def heartbeat_job(job_id: str, worker_id: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+    """
+    lease 연장. 이 워커가 여전히 소유한 running 잡이면 {"cancel_requested": bool} 반환,
+    소유권을 잃었으면(재할당/종료) None.
+    """
+    now = datetime.utcnow()
+    return _jobs.find_one_and_update(
+        {"_id": _oid(job_id), "status": "running", "worker_id": worker_id},
+        {"$set": {
+            "heartbeat_at": now,
+            "lease_expires_at": now + timedelta(seconds=int(lease_seconds)),
+            "updated_at": now,
+        }},
+        projection={"cancel_requested": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def finish_job(job_id: str, worker_id: str, status: str, fields: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    running → 종료 상태(succeeded/failed/canceled) 전이. 이 워커가 소유한 경우에만 반영.
+    False = 소유권을 잃어 결과를 버림(다른 워커가 재실행 중).
+    """
+    if status not in TERMINAL_STATUSES:
+        raise ValueError(f"not a terminal status: {status}")
+    now = datetime.utcnow()
+    prev = _jobs.find_one_and_update(
+        {"_id": _oid(job_id), "status": "running", "worker_id": worker_id},
+        {"$set": {
+            **(fields or {}),
+            "status": status,
+            "finished_at": now,
+            "lease_expires_at": None,
+            "updated_at": now,
+        }, "$unset": {"active_lock": ""}},
+        projection={"user_id": 1},
+    )
+    if prev is None:
+        return False
+    _release_user_slot(prev.get("user_id"))
+    _release_active(prev.get("user_id"))
+    return True
+
+
+def cancel_job(job_id: str) -> bool:
+    """
+    취소 요청. queued/delayed 면 즉시 canceled, running 이면 cancel_requested 만 표시(워커가 중단 후 canceled 로 전이).
+    """
+    now = datetime.utcnow()
+    prev = _jobs.find_one_and_update(
+        {"_id": _oid(job_id), "status": {"$in": ["queued", "delayed"]}},
+        {"$set": {"status": "canceled", "cancel_requested": True, "message": "canceled",
+                  "finished_at": now, "updated_at": now},
+         "$unset": {"active_lock": ""}},
+        projection={"user_id": 1},
+    )
+    if prev is not None:
+        _release_active(prev.get("user_id"))
+        return True
+    res = _jobs.update_one(
+        {"_id": _oid(job_id), "status": {"$nin": list(TERMINAL_STATUSES)}},
+        {"$set": {"cancel_requested": True, "message": "cancel requested", "updated_at": now}},
+    )
+    return res.matched_count == 1
+
+
+# -------------------------------------------------------------------
+# 상태 변경 구독 (GET /runs/stream)
+# -------------------------------------------------------------------
+RUN_STATUS_FIELDS = ("status", "progress", "message")
+
+
+def watch_job_status(resume_after: Optional[Dict[str, Any]] = None, max_await_ms: int = 1000):
+    """
+    jobs change stream: RUN_STATUS_FIELDS 중 하나라도 바뀐 insert/replace/update 만
+    (heartbeat 등 lease 갱신은 서버에서 걸러짐). 각 이벤트는 documentKey + 바뀐 상태 필드만 포함.
+    replica set/sharded cluster 가 아니면 OperationFailure.
+    """
+    changed = [{f"updateDescription.updatedFields.{f}": {"$exists": True}} for f in RUN_STATUS_FIELDS]
+    pipeline = [
+        {"$match": {"$or": [
+            {"operationType": {"$in": ["insert", "replace"]}},
+            {"$and": [{"operationType": "update"}, {"$or": changed}]},
+        ]}},
+        {"$project": {
+            "operationType": 1,
+            "documentKey": 1,
+            **{f"fullDocument.{f}": 1 for f in RUN_STATUS_FIELDS},
+            **{f"updateDescription.updatedFields.{f}": 1 for f in RUN_STATUS_FIELDS},
+        }},
+    ]
+    return _jobs.watch(pipeline, resume_after=resume_after, max_await_time_ms=int(max_await_ms))
+
+
+# -------------------------------------------------------------------
+# Sweeper: lease 만료된 running 잡 복구
+# -------------------------------------------------------------------
+def _recovery(j: Dict[str, Any], now: datetime, max_attempts: int, backoff_seconds: int,
+              reason: str) -> Tuple[str, Dict[str, Any]]:
+    # 실행이 중단된 running 잡의 다음 상태: (canceled | requeued | failed, $set 필드)
+    attempts = int(j.get("attempts") or 0)
+    base = {"worker_id": None, "lease_expires_at": None, "updated_at": now, "last_worker_id": j.get("worker_id")}
+    if j.get("cancel_requested"):
+        return "canceled", {**base, "status": "canceled", "finished_at": now, "message": "canceled"}
+    if attempts < int(max_attempts):
+        delay = int(backoff_seconds) * (2 ** max(attempts - 1, 0))
+        return "requeued", {
+            **base, "status": "delayed" if delay > 0 else "queued", "progress": 0.0,
+            "not_before": now + timedelta(seconds=delay),
+            "message": f"requeued after {reason} (attempt {attempts}/{int(max_attempts)}, retry in {delay}s)",
+        }
+    return "failed", {**base, "status": "failed", "finished_at": now,
+                      "message": f"{reason} after {attempts} attempts"}
+
+
+def _apply_recovery(guard: Dict[str, Any], user_id: Optional[str], kind: str, fields: Dict[str, Any]) -> bool:
+    update: Dict[str, Any] = {"$set": fields}
+    if kind != "requeued":
+        update["$unset"] = {"active_lock": ""}
+    if not _jobs.update_one(guard, update).modified_count:
+        return False
+    _release_user_slot(user_id)
+    if kind != "requeued":
+        _release_active(user_id)
+    return True
+
+
+def requeue_job(job_id: str, worker_id: str, max_attempts: int, backoff_seconds: int,
+                reason: str) -> Optional[str]:
+    """
+    이 워커가 소유한 running 잡을 스위퍼와 같은 규칙(backoff/재시도 한도)으로 되돌림.
+    워커 쪽 실행 환경 장애(프로세스 풀 손상 등)로 잡 결과를 받지 못했을 때 lease 만료를 기다리지 않도록.
+    반환: "requeued" | "failed" | "canceled", 소유권을 잃었으면 None
+    """
+    j = _jobs.find_one({"_id": _oid(job_id), "status": "running", "worker_id": worker_id},
+                       projection={"attempts": 1, "worker_id": 1, "cancel_requested": 1, "user_id": 1})
+    if j is None:
+        return None
+    kind, fields = _recovery(j, datetime.utcnow(), max_attempts, backoff_seconds, reason)
+    guard = {"_id": j["_id"], "status": "running", "worker_id": worker_id}
+    return kind if _apply_recovery(guard, j.get("user_id"), kind, fields) else None
+
+
+def requeue_expired_jobs(max_attempts: int, backoff_seconds: int, limit: int = 100) -> Dict[str, int]:
+    """
+    lease 가 만료된 running 잡(워커 종료/중단)을 처리.
+    - 취소 요청된 잡: canceled
+    - attempts < max_attempts: delayed 로 되돌림, not_before = now + backoff × 2^(attempts-1)
+      (backoff 가 0 이면 바로 queued). 클레임 전 promote_delayed_jobs 가 queued 로 승격
+    - 그 외: failed
+    각 전이는 조회 시점의 lease_expires_at 이 그대로일 때만 반영(그 사이 heartbeat 가 오면 건너뜀).
+    여러 워커가 동시에 실행해도 안전. 반환/누적: {"requeued", "failed", "canceled"}
+    """
+    now = datetime.utcnow()
+    counts = {"requeued": 0, "failed": 0, "canceled": 0}
+    expired = _jobs.find(
+        {"status": "running", "lease_expires_at": {"$lt": now}},
+        projection={"attempts": 1, "lease_expires_at": 1, "worker_id": 1, "cancel_requested": 1, "user_id": 1},
+    ).sort("lease_expires_at", ASCENDING).limit(int(limit))
+
+    for j in expired:
+        guard = {"_id": j["_id"], "status": "running", "lease_expires_at": j["lease_expires_at"]}
+        kind, fields = _recovery(j, now, max_attempts, backoff_seconds, "lease expiry")
+        if _apply_recovery(guard, j.get("user_id"), kind, fields):
+            counts[kind] += 1
+
+    if any(counts.values()):
+        _counters.update_one(
+            {"_id": "sweeper"},
+            {"$inc": {f"{k}_total": v for k, v in counts.items()}, "$set": {"last_recovered_at": now}},
+            upsert=True,
+        )
+    return counts
+
+
+def get_sweeper_stats() -> Dict[str, Any]:
+    doc = _counters.find_one({"_id": "sweeper"}) or {}
+    doc.pop("_id", None)
+    return doc
+
+
+# -------------------------------------------------------------------
+# 활성 잡 카운터 (quotas 용, O(1) 조회)
+# -------------------------------------------------------------------
+def count_active_jobs_global() -> int:
+    return int((_counters.find_one({"_id": _GLOBAL_KEY}) or {}).get("active") or 0)
+
+
+def count_active_jobs_by_user(user_id: Optional[str]) -> int:
+    return int((_counters.find_one({"_id": _user_key(user_id)}) or {}).get("active") or 0)
+
+
+def reconcile_counters() -> Dict[str, Any]:
+    """
+    jobs 컬렉션(진실)으로 활성/running 카운터를 다시 맞춤. 워커가 주기적으로, 서버 시작 시 1회 호출.
+    집계와 덮어쓰기 사이의 전이는 다음 reconcile 에서 보정됨.
+    """
+    now = datetime.utcnow()
+    per_user: Dict[Any, Dict[str, int]] = {}
+    total = 0
+    rows = _jobs.aggregate([
+        {"$match": {"status": {"$in": list(ACTIVE_STATUSES)}}},
+        {"$group": {"_id": {"u": "$user_id", "s": "$status"}, "n": {"$sum": 1}}},
+    ])
+    for row in rows:
+        c = per_user.setdefault(row["_id"].get("u"), {"active": 0, "running": 0})
+        c["active"] += int(row["n"])
+        if row["_id"].get("s") == "running":
+            c["running"] += int(row["n"])
+        total += int(row["n"])
+
+    _counters.update_one({"_id": _GLOBAL_KEY}, {"$set": {"active": total, "reconciled_at": now}}, upsert=True)
+    keys = {_user_key(u): c for u, c in per_user.items()}
+    for d in _counters.find({"_id": {"$regex": "^user:"}}, projection={"_id": 1}):
+        if d["_id"] not in keys:
+            _counters.update_one({"_id": d["_id"]}, {"$set": {"active": 0, "running": 0}})
+    for key, c in keys.items():
+        _counters.update_one({"_id": key}, {"$set": c}, upsert=True)
+    return {"active": total, "users": len(keys), "reconciled_at": now}
@@ -0,0 +1,126 @@
+# backend/app/services/compaction.py
+
+"""
+DataFrame dtype 압축 (load_dataset(compact=True))
+- 정수: 실제 min/max 가 들어가는 가장 작은 int/uint 로 다운캐스트
+- 실수: float32 왕복 시 값이 완전히 같을 때만 float32 (무손실)
+- 문자열(object/string): 고유값 비율이 낮으면 category
+- object 인데 값이 모두 bool: bool (결측 있으면 boolean)
+- 계획(컬럼 → dtype)은 .cache/<key>/dtype_plan.json 에 원본 stamp 와 함께 저장 → 이후 로드는 계산 없이 재사용
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.services.dataset_store import cache_dir, source_stamp, write_cache_json
+
+CATEGORY_MAX_RATIO = 0.5       # 고유값 수 / 행 수 상한
+CATEGORY_MAX_UNIQUE = 65_536   # 고유값 수 상한
+
+_PLAN_FILE = "dtype_plan.json"
+
+_INT_CANDIDATES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32)
+
+
+def _int_dtype(s: pd.Series) -> Optional[str]:
+    if not len(s):
+        return None
+    lo, hi = int(s.min()), int(s.max())
+    for t in _INT_CANDIDATES:
+        info = np.iinfo(t)
+        if info.min <= lo and hi <= info.max:
+            name = np.dtype(t).name
+            return name if name != str(s.dtype) else None
+    return None
+
+
+def _float_dtype(s: pd.Series) -> Optional[str]:
+    if s.dtype != np.float64:
+        return None
+    v = s.to_numpy()
+    with np.errstate(over="ignore"):
+        v32 = v.astype(np.float32)
+    return "float32" if np.array_equal(v32.astype(np.float64), v, equal_nan=True) else None
+
+
+def _object_dtype(s: pd.Series) -> Optional[str]:
+    nn = s.dropna()
+    if not len(nn):
+        return None
+    if all(isinstance(x, (bool, np.bool_)) for x in nn):
+        return "bool" if len(nn) == len(s) else "boolean"
+    n_unique = int(nn.nunique())
+    if n_unique <= CATEGORY_MAX_UNIQUE and n_unique <= CATEGORY_MAX_RATIO * len(s):
+        return "category"
+    return None
+
+
+def plan_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+    """바꿀 컬럼만 {컬럼: 목표 dtype}"""
+    plan: Dict[str, str] = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_bool_dtype(s.dtype):
+            continue
+        if pd.api.types.is_integer_dtype(s.dtype) and isinstance(s.dtype, np.dtype):
+            t = _int_dtype(s)
+        elif pd.api.types.is_float_dtype(s.dtype):
+            t = _float_dtype(s)
+        elif s.dtype == object or isinstance(s.dtype, pd.StringDtype):
+            t = _object_dtype(s)
+        else:
+            t = None
+        if t:
+            plan[str(c)] = t
+    return plan
+
+
+def _read_plan(path: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(cache_dir(path), _PLAN_FILE), "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if any(stored.get(k) != v for k, v in source_stamp(path).items()):
+        return {}
+    return stored
+
+
+def _write_plan(path: str, stored: Dict[str, Any]) -> None:
+    write_cache_json(path, _PLAN_FILE, stored)
+
+
+def compact_frame(path: str, df: pd.DataFrame, persist: bool = True) -> pd.DataFrame:
+    """
+    path(원본 데이터셋)의 저장된 계획을 적용. 계획에 없는 컬럼은 이번 프레임으로 계산 후 계획에 추가.
+    persist=False: 이번 프레임이 원본 전체가 아님(필터 등) → 새로 계산한 계획은 저장하지 않음
+    결과 프레임 attrs["compaction"] = {bytes_before, bytes_after, bytes_saved, dtypes}
+    """
+    stored = _read_plan(path)
+    planned = set(stored.get("planned") or [])
+    plan: Dict[str, str] = dict(stored.get("dtypes") or {})
+    todo = [c for c in df.columns if str(c) not in planned]
+    if todo:
+        plan.update(plan_dtypes(df[todo]))
+    if todo and persist:
+        _write_plan(path, {
+            **source_stamp(path),
+            "planned": sorted(planned | {str(c) for c in todo}),
+            "dtypes": plan,
+        })
+
+    before = int(df.memory_usage(deep=True).sum())
+    applied = {c: t for c, t in plan.items() if c in df.columns and str(df[c].dtype) != t}
+    out = df.astype(applied) if applied else df.copy(deep=False)
+    after = int(out.memory_usage(deep=True).sum())
+    out.attrs["compaction"] = {
+        "bytes_before": before,
+        "bytes_after": after,
+        "bytes_saved": before - after,
+        "dtypes": applied,
+    }
+    return out
@@ -1,21 +1,438 @@
 # backend/app/services/data_loader.py
 
 from __future__ import annotations
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
 from pathlib import Path
+import threading
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
-def load_dataset(uri: str) -> pd.DataFrame:
+from app.config import settings
+from app.services.dataset_store import sidecar_parquet, source_stamp
+from app.services.compaction import compact_frame
+
+# -------------------------------------------------------------------
+# 프로세스 내 DataFrame 캐시 (바이트 예산 + LRU)
+# -------------------------------------------------------------------
+class FrameCache:
     """
-    file:// 경로만 지원 (로컬 파일)
+    키: (읽은 경로, 원본 stamp, 컬럼 projection, 필터, compact). 값: DataFrame(공유 객체 — 호출측은 in-place 수정 금지).
+    memory_usage(deep=True) 합이 budget 을 넘으면 오래된 것부터 제거. 예산보다 큰 프레임은 캐시하지 않음.
     """
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = int(budget_bytes)
+        self._items: "OrderedDict[Tuple[Any, ...], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[pd.DataFrame]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Tuple[Any, ...], df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.budget_bytes and self._items:
+                _, (_, freed) = self._items.popitem(last=False)
+                self._bytes -= freed
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_frame_cache = FrameCache(settings.DATAFRAME_CACHE_BYTES)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return _frame_cache.stats()
+
+
+def _source_path(uri: str) -> Path:
+    """file:// 파일 또는 디렉터리(hive 파티션 parquet 데이터셋)"""
     if not uri.startswith("file://"):
         raise ValueError("only file:// uri supported for now")
-    p = Path(uri.replace("file://", "", 1))
+    return Path(uri.replace("file://", "", 1))
+
+
+# 문자열 매칭 연산: 값을 문자열로 캐스팅해 비교 (row group 통계 pruning 대상 아님)
+_STRING_FILTER_OPS = {"contains": pc.match_substring, "startswith": pc.starts_with}
+
+
+_FILTER_OPS = {"==", "=", "!=", "<", "<=", ">", ">=", "in", "not in", *_STRING_FILTER_OPS}
+
+
+def _check_filters(filters: Optional[List[Any]]) -> Optional[List[List[Any]]]:
+    """filters 형식 검증 → [[col, op, value], ...] | None. 잘못되면 ValueError (API 에서 400)"""
+    if not filters:
+        return None
+    if not isinstance(filters, (list, tuple)):
+        raise ValueError("filters must be a list of [column, op, value]")
+    out: List[List[Any]] = []
+    for f in filters:
+        if not isinstance(f, (list, tuple)) or len(f) != 3:
+            raise ValueError(f"filter must be [column, op, value]: {f!r}")
+        col, op, value = f
+        if not isinstance(col, str) or not col:
+            raise ValueError(f"filter column must be a non-empty string: {f!r}")
+        if op not in _FILTER_OPS:
+            raise ValueError(f"unsupported filter op {op!r}")
+        if op in ("in", "not in") and not isinstance(value, (list, tuple)):
+            raise ValueError(f"'{op}' filter needs a list value: {f!r}")
+        out.append([col, op, value])
+    return out
+
+
+def _filter_expr(filters: Optional[List[List[Any]]]) -> Optional[ds.Expression]:
+    # [[col, op, value], ...] → pyarrow 식 (op: ==, !=, <, <=, >, >=, in, not in, contains, startswith)
+    filters = _check_filters(filters)
+    if not filters:
+        return None
+    plain = [tuple(f) for f in filters if f[1] not in _STRING_FILTER_OPS]
+    expr = pq.filters_to_expression(plain) if plain else None
+    for col, op, value in (f for f in filters if f[1] in _STRING_FILTER_OPS):
+        e = _STRING_FILTER_OPS[op](ds.field(col).cast(pa.string()), pattern=str(value))
+        expr = e if expr is None else expr & e
+    return expr
+
+
+_ROW_COL = "__vml_row"
+
+
+def _sorted_window(keys: pa.Table, sort_by: str, descending: bool, offset: int, limit: int) -> pa.Array:
+    """
+    keys(정렬 키 + _ROW_COL) 에서 정렬 순서상 [offset, offset+limit) 행의 _ROW_COL 값.
+    전체 정렬 대신 select_k 로 상위 offset+limit 개만 고름 (동률은 원래 행 순서 → 안정 정렬과 같은 결과)
+    """
+    k = min(offset + limit, keys.num_rows)
+    if k <= 0:
+        return pa.array([], type=pa.int64())
+    idx = pc.select_k_unstable(keys.select([sort_by, _ROW_COL]), k=k, sort_keys=[
+        (sort_by, "descending" if descending else "ascending"), (_ROW_COL, "ascending")])
+    return keys[_ROW_COL].take(idx.slice(offset, limit))
+
+
+def _parquet_dataset(p: Path) -> ds.Dataset:
+    """
+    단일 parquet 파일 또는 디렉터리 데이터셋.
+    디렉터리는 hive 파티션(col=value/...)을 컬럼으로 인식하고, 필터는 파티션 경로 → row group 통계 순으로 pruning.
+    """
+    if p.is_dir():
+        return ds.dataset(str(p), format="parquet", partitioning="hive")
+    return ds.dataset(str(p), format="parquet")
+
+
+# -------------------------------------------------------------------
+# CSV 리더 백엔드 (settings.CSV_READER_BACKEND)
+# -------------------------------------------------------------------
+if int(settings.CSV_THREADS) > 0:
+    pa.set_cpu_count(int(settings.CSV_THREADS))
+
+
+def arrow_csv_options(columns: Optional[List[str]] = None) -> Tuple[pacsv.ReadOptions, pacsv.ConvertOptions]:
+    """
+    arrow CSV 옵션 (load_dataset / ingest 공용)
+    - block_size 단위로 나눠 CPU 스레드풀에서 병렬 파싱
+    - 빈 문자열은 pandas 와 같이 결측으로
+    """
+    read_opts = pacsv.ReadOptions(use_threads=True, block_size=int(settings.CSV_BLOCK_SIZE))
+    convert_opts = pacsv.ConvertOptions(include_columns=columns or [], strings_can_be_null=True)
+    return read_opts, convert_opts
+
+
+def _read_csv_arrow(p: Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    read_opts, convert_opts = arrow_csv_options(columns)
+    return pacsv.read_csv(p, read_options=read_opts, convert_options=convert_opts).to_pandas()
+
+
+def _read_csv(p: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    arrow: 멀티스레드 파싱 (코어 수만큼 확장). 따옴표 안 개행/타입 추론 실패 등은 ArrowInvalid → pandas 폴백
+    pandas: 기존 단일 스레드 C 파서
+    """
+    if str(settings.CSV_READER_BACKEND).lower() == "arrow":
+        try:
+            return _read_csv_arrow(p, columns)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    df = pd.read_csv(p, usecols=columns)
+    return df[columns] if columns else df
+
+
+def _read_frame(p: Path, columns: Optional[List[str]] = None,
+                filters: Optional[List[List[Any]]] = None) -> pd.DataFrame:
     ext = p.suffix.lower()
+    if p.is_dir() or (filters and ext == ".parquet"):
+        return _parquet_dataset(p).to_table(columns=columns, filter=_filter_expr(filters)).to_pandas()
+    if filters:
+        # 행 기반 원본(ingest 전): 필터 컬럼까지 읽은 뒤 메모리에서 필터
+        read_cols = list(dict.fromkeys(columns + [f[0] for f in filters])) if columns else None
+        tbl = pa.Table.from_pandas(_read_frame(p, read_cols), preserve_index=False).filter(_filter_expr(filters))
+        return (tbl.select(columns) if columns else tbl).to_pandas()
     if ext == ".csv":
-        return pd.read_csv(p)
+        return _read_csv(p, columns)
     if ext in [".xlsx", ".xls"]:
-        return pd.read_excel(p)
+        df = pd.read_excel(p, usecols=columns)
+        return df[columns] if columns else df
     if ext == ".parquet":
-        return pd.read_parquet(p)
-    raise ValueError(f"unsupported extension: {ext}")
\ No newline at end of file
+        # memory_map + 컬럼 projection: 선택한 컬럼 청크만 읽음
+        return pq.read_table(p, columns=columns, memory_map=True).to_pandas()
+    raise ValueError(f"unsupported extension: {ext}")
+
+
+def _columnar_path(p: Path) -> Optional[Path]:
+    """컬럼형으로 읽을 수 있는 경로: 원본 parquet(파일/디렉터리) 또는 유효한 ingest sidecar"""
+    ext = p.suffix.lower()
+    if ext == ".parquet" or p.is_dir():
+        return p
+    if ext in [".csv", ".xlsx", ".xls"]:
+        cached = sidecar_parquet(str(p))
+        if cached:
+            return Path(cached)
+    return None
+
+
+def load_dataset(uri: str, columns: Optional[List[str]] = None, cache: bool = True,
+                 compact: bool = False, filters: Optional[List[List[Any]]] = None) -> pd.DataFrame:
+    """
+    file:// 파일 또는 디렉터리(hive 파티션 parquet) 경로 지원
+    ingest 로 만든 Parquet sidecar 가 유효하면 원본 대신 sidecar 를 읽음
+    columns: 읽을 컬럼 projection (None = 전체). 컬럼형이면 해당 컬럼 청크만 읽음
+    filters: [[col, op, value], ...] 행 필터. 컬럼형이면 파티션/row group 통계로 pushdown
+    compact=True: 무손실 dtype 압축(다운캐스트/category/bool) 적용, 절감량은 df.attrs["compaction"]
+    cache=True: 프로세스 내 FrameCache 사용 (반환 프레임은 공유되므로 수정 전 copy())
+    """
+    src = _source_path(uri)
+    p = _columnar_path(src) or src
+    columns = list(dict.fromkeys(columns)) if columns else None
+    filters = _check_filters(filters)
+
+    def _read() -> pd.DataFrame:
+        df = _read_frame(p, columns, filters)
+        # 필터 결과(일부 행)로 만든 dtype 계획은 다른 조건에서 무손실이 아닐 수 있으므로 저장하지 않음
+        return compact_frame(str(src), df, persist=not filters) if compact else df
+
+    if not (cache and _frame_cache.budget_bytes > 0):
+        return _read()
+    key = (
+        str(p.resolve()), tuple(source_stamp(str(p)).values()),
+        tuple(columns) if columns else None, repr(filters) if filters else None, bool(compact),
+    )
+    df = _frame_cache.get(key)
+    if df is None:
+        df = _read()
+        _frame_cache.put(key, df)
+    return df
+
+
+def columns_for_task(task_ref: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    태스크가 실제로 쓰는 컬럼(features + target). 피처 미지정이면 None(전체).
+    """
+    features = ((task_ref or {}).get("model_params") or {}).get("_features")
+    if not features:
+        return None
+    target = (task_ref or {}).get("target")
+    return list(dict.fromkeys(list(features) + ([target] if target else [])))
+
+
+def filters_for_task(task_ref: Dict[str, Any]) -> Optional[List[List[Any]]]:
+    """태스크 행 필터(model_params['_filters'], 예: 특정 월 파티션). 없으면 None"""
+    return ((task_ref or {}).get("model_params") or {}).get("_filters") or None
+
+def _read_parquet_head(path, limit: int) -> pd.DataFrame:
+    # 앞쪽 row group 부터 limit 행이 찰 때까지만 배치 단위로 읽음
+    if Path(path).is_dir():
+        return _parquet_dataset(Path(path)).head(limit).to_pandas()
+    pf = pq.ParquetFile(path)
+    batches: List[pa.RecordBatch] = []
+    got = 0
+    for b in pf.iter_batches(batch_size=max(1, limit)):
+        batches.append(b.slice(0, limit - got))
+        got += batches[-1].num_rows
+        if got >= limit:
+            break
+    return pa.Table.from_batches(batches, schema=pf.schema_arrow).to_pandas()
+
+def load_preview(uri: str, limit: int = 50) -> pd.DataFrame:
+    """
+    미리보기용 부분 읽기: limit 행만 반환
+    - Parquet(sidecar 포함): 앞쪽 배치만
+    - CSV: nrows
+    - XLSX/XLS(ingest 전): pd.read_excel(nrows=limit) — openpyxl 이 워크북 전체를 연 뒤 앞쪽 행만 DataFrame 으로
+    """
+    p = _source_path(uri)
+    ext = p.suffix.lower()
+    limit = max(0, int(limit))
+    columnar = _columnar_path(p)
+    if columnar:
+        return _read_parquet_head(columnar, limit)
+    if ext == ".csv":
+        return pd.read_csv(p, nrows=limit)
+    if ext in [".xlsx", ".xls"]:
+        return pd.read_excel(p, nrows=limit)
+    raise ValueError(f"unsupported extension: {ext}")
+
+
+# -------------------------------------------------------------------
+# 배치 스트리밍 (프로파일링/샘플링 등 전체 적재 없이 순회)
+# -------------------------------------------------------------------
+def iter_frames(uri: str, columns: Optional[List[str]] = None, batch_rows: int = 65536,
+                filters: Optional[List[List[Any]]] = None) -> Iterator[pd.DataFrame]:
+    """
+    데이터셋을 batch_rows 단위 DataFrame 으로 순회 (메모리 = 배치 1개)
+    - 컬럼형(parquet/sidecar): row group → record batch
+    - 디렉터리/필터: pyarrow dataset 스캔 (파티션/row group pruning)
+    - CSV(ingest 전): read_csv chunksize (필터는 배치별 적용)
+    - XLSX(ingest 전): 전체 로드 후 슬라이스 (변환 완료 후에는 sidecar 경로 사용)
+    """
+    p = _source_path(uri)
+    columns = list(columns) if columns else None
+    filters = _check_filters(filters)
+    columnar = _columnar_path(p)
+    if columnar and (filters or columnar.is_dir()):
+        for b in _parquet_dataset(columnar).to_batches(
+            columns=columns, filter=_filter_expr(filters), batch_size=int(batch_rows),
+        ):
+            if b.num_rows:
+                yield b.to_pandas()
+        return
+    if columnar:
+        pf = pq.ParquetFile(columnar)
+        for b in pf.iter_batches(batch_size=int(batch_rows), columns=columns):
+            yield b.to_pandas()
+        return
+    if p.suffix.lower() == ".csv":
+        read_cols = list(dict.fromkeys(columns + [f[0] for f in filters])) if (columns and filters) else columns
+        for chunk in pd.read_csv(p, chunksize=int(batch_rows), usecols=read_cols):
+            if filters:
+                tbl = pa.Table.from_pandas(chunk, preserve_index=False).filter(_filter_expr(filters))
+                chunk = (tbl.select(columns) if columns else tbl).to_pandas()
+            yield chunk
+        return
+    df = load_dataset(uri, columns=columns, filters=filters)
+    for i in range(0, len(df), int(batch_rows)):
+        yield df.iloc[i:i + int(batch_rows)]
+
+
+# -------------------------------------------------------------------
+# 윈도우 조회 (offset/limit + 컬럼 projection + 선택적 정렬/필터)
+# -------------------------------------------------------------------
+def _row_group_window(pf: pq.ParquetFile, offset: int, limit: int,
+                      columns: Optional[List[str]]) -> pa.Table:
+    # row group 메타데이터(행 수)로 [offset, offset+limit) 에 걸친 그룹만 읽음
+    md = pf.metadata
+    start = 0
+    first_start = None
+    groups: List[int] = []
+    for rg in range(md.num_row_groups):
+        n = md.row_group(rg).num_rows
+        if start + n > offset and start < offset + limit:
+            if first_start is None:
+                first_start = start
+            groups.append(rg)
+        start += n
+        if start >= offset + limit:
+            break
+    if not groups:
+        return pf.schema_arrow.empty_table().select(columns) if columns else pf.schema_arrow.empty_table()
+    tbl = pf.read_row_groups(groups, columns=columns)
+    return tbl.slice(offset - first_start, limit)
+
+
+def read_window(
+    uri: str,
+    offset: int = 0,
+    limit: int = 100,
+    columns: Optional[List[str]] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    filters: Optional[List[List[Any]]] = None,
+) -> Tuple[pd.DataFrame, Optional[int]]:
+    """
+    데이터셋 일부 조회 → (DataFrame, 전체 행 수 | None)
+    - 컬럼형(parquet/sidecar) + 정렬/필터 없음: row group seek, 필요한 그룹/컬럼만 읽음
+    - 디렉터리 또는 필터만: pyarrow dataset 스캔을 offset+limit 행에서 중단
+    - 정렬: 정렬 키(+필터 컬럼)만 읽어 select_k 로 offset+limit 행 선택 → projection 컬럼은 그 행만 take
+    - filters: [[col, op, value], ...] (op: ==, !=, <, <=, >, >=, in, not in, contains, startswith)
+    - 컬럼형이 아직 없으면(ingest 전): 필터/정렬 없을 때 CSV skiprows/nrows, 그 외 load_dataset 폴백
+    """
+    p = _source_path(uri)
+    offset = max(0, int(offset))
+    limit = max(0, int(limit))
+    columns = list(columns) if columns else None
+    filters = _check_filters(filters)
+    columnar = _columnar_path(p)
+
+    if columnar and not columnar.is_dir() and not (sort_by or filters):
+        pf = pq.ParquetFile(columnar)
+        return _row_group_window(pf, offset, limit, columns).to_pandas(), int(pf.metadata.num_rows)
+
+    if p.suffix.lower() == ".csv" and not columnar and not (sort_by or filters):
+        df = pd.read_csv(p, skiprows=range(1, offset + 1), nrows=limit, usecols=columns)
+        return df, None
+
+    expr = _filter_expr(filters)
+    if columnar and not sort_by:
+        # 정렬 없음: 조건에 맞는 앞쪽 offset+limit 행까지만 스캔, 전체 건수는 메타데이터/통계로 계산
+        dset = _parquet_dataset(columnar)
+        tbl = dset.head(offset + limit, columns=columns, filter=expr).slice(offset, limit)
+        return tbl.to_pandas(), int(dset.count_rows(filter=expr))
+    if columnar:
+        # 정렬: 정렬 키(+필터 컬럼)만 읽어 필요한 행 번호를 고른 뒤, projection 컬럼은 그 행만 take
+        dset = _parquet_dataset(columnar)
+        key_cols = list(dict.fromkeys([sort_by] + [f[0] for f in filters or []]))
+        keys = dset.to_table(columns=key_cols)
+        keys = keys.append_column(_ROW_COL, pa.array(np.arange(keys.num_rows, dtype=np.int64)))
+        if expr is not None:
+            keys = keys.filter(expr)
+        rows = _sorted_window(keys, sort_by, descending, offset, limit)
+        return dset.take(rows, columns=columns).to_pandas(), int(keys.num_rows)
+    tbl = pa.Table.from_pandas(load_dataset(uri), preserve_index=False)
+    if expr is not None:
+        tbl = tbl.filter(expr)
+    total = tbl.num_rows
+    if sort_by:
+        tbl = tbl.take(_sorted_window(
+            tbl.append_column(_ROW_COL, pa.array(np.arange(tbl.num_rows, dtype=np.int64))),
+            sort_by, descending, offset, limit))
+    else:
+        tbl = tbl.slice(offset, limit)
+    if columns:
+        tbl = tbl.select(columns)
+    return tbl.to_pandas(), int(total)
@@ -0,0 +1,191 @@
+# backend/app/services/dataset_store.py
+
+"""
+업로드 데이터셋 저장소 (ARTIFACT_ROOT/datasets)
+- 업로드 본문을 고정 크기 청크로 임시파일(.part)에 기록 → 원자적 rename
+- 파일 크기와 무관하게 피크 메모리 = 청크 1개
+- 내용 주소 기반: 기록하면서 sha256 계산 → <digest><ext> 로 저장
+  같은 내용이 이미 있으면 임시파일을 버리고 기존 경로 반환(중복 제거)
+  digest 는 다운스트림 캐시의 안정적인 키로 사용 가능
+- 파생 캐시(datasets/.cache/<key>/): ingest 결과 data.parquet + meta.json
+"""
+from __future__ import annotations
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+from app.config import settings
+
+ALLOWED_EXTS = (".csv", ".xlsx", ".parquet")
+
+_CACHE_DIRNAME = ".cache"
+_META_FILE = "meta.json"
+SIDECAR_PARQUET = "data.parquet"
+
+
+def datasets_dir() -> str:
+    d = os.path.join(settings.ARTIFACT_ROOT, "datasets")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def iter_file_chunks(fp: BinaryIO, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    size = int(chunk_size or settings.UPLOAD_CHUNK_BYTES)
+    while True:
+        chunk = fp.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def save_stream(chunks: Iterable[bytes], ext: str) -> Dict[str, Any]:
+    """
+    청크 이터러블 → datasets/.upload-*.part 순차 기록(+sha256) → fsync → <digest><ext> 로 rename.
+    동일 digest 파일이 이미 있으면 임시파일 삭제 후 기존 파일 사용.
+    실패 시 임시파일 삭제.
+    반환: {"path", "digest", "deduplicated", "bytes_written", "elapsed_ms"}
+    """
+    d = datasets_dir()
+    t0 = time.perf_counter()
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=d)
+    h = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                h.update(chunk)
+                out.write(chunk)
+                written += len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        digest = h.hexdigest()
+        final_path = os.path.join(d, f"{digest}{ext}")
+        deduplicated = os.path.exists(final_path)
+        if deduplicated:
+            os.remove(tmp_path)
+        else:
+            # 동시 업로드로 같은 digest 가 경합해도 내용이 같으므로 덮어써도 무방
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return {
+        "path": final_path,
+        "digest": digest,
+        "deduplicated": deduplicated,
+        "bytes_written": written,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+    }
+
+
+# -------------------------------------------------------------------
+# dataset_id (= 내용 digest) ↔ 경로
+# -------------------------------------------------------------------
+def dataset_id_for_path(path: str) -> Optional[str]:
+    """datasets/ 아래 내용 주소 파일이면 digest, 아니면 None"""
+    path = os.path.abspath(path)
+    if os.path.dirname(path) != os.path.abspath(datasets_dir()):
+        return None
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def resolve_dataset_id(dataset_id: str) -> Optional[str]:
+    if not dataset_id or not all(c in "0123456789abcdef" for c in dataset_id):
+        return None
+    d = datasets_dir()
+    for ext in ALLOWED_EXTS:
+        p = os.path.join(d, f"{dataset_id}{ext}")
+        if os.path.exists(p):
+            return p
+    return None
+
+
+# -------------------------------------------------------------------
+# 파생 캐시 (ingest sidecar)
+# -------------------------------------------------------------------
+def cache_dir(path: str) -> str:
+    """
+    데이터셋별 파생 캐시 디렉터리.
+    datasets/ 아래 파일은 파일명(<digest><ext>), 그 외 경로는 절대경로 해시로 키를 만든다.
+    """
+    path = os.path.abspath(path)
+    d = datasets_dir()
+    if os.path.dirname(path) == os.path.abspath(d):
+        key = os.path.basename(path)
+    else:
+        key = "ext-" + hashlib.sha1(path.encode("utf-8")).hexdigest()[:20]
+    out = os.path.join(d, _CACHE_DIRNAME, key)
+    os.makedirs(out, exist_ok=True)
+    return out
+
+
+def source_stamp(path: str) -> Dict[str, int]:
+    """
+    원본 변경 감지용 (mtime_ns, size).
+    디렉터리 데이터셋(파티션 parquet)은 하위 파일 전체의 최대 mtime / 총 크기.
+    """
+    st = os.stat(path)
+    if not os.path.isdir(path):
+        return {"source_mtime_ns": int(st.st_mtime_ns), "source_size": int(st.st_size)}
+    mtime, size = int(st.st_mtime_ns), 0
+    for root, dirs, files in os.walk(path):
+        mtime = max([mtime] + [int(os.stat(os.path.join(root, d)).st_mtime_ns) for d in dirs])
+        for name in files:
+            fst = os.stat(os.path.join(root, name))
+            mtime = max(mtime, int(fst.st_mtime_ns))
+            size += int(fst.st_size)
+    return {"source_mtime_ns": mtime, "source_size": size}
+
+
+def read_cache_meta(path: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(cache_dir(path), _META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_cache_json(path: str, name: str, obj: Any, **dump_kwargs: Any) -> None:
+    """
+    캐시 디렉터리의 JSON 파일을 원자적으로 교체 (임시파일 → rename).
+    임시파일 이름은 mkstemp 로 유일 → 같은 프로세스의 여러 스레드(ingest 풀)가 같은 파일을 써도 충돌 없음.
+    """
+    d = cache_dir(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=d)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, **dump_kwargs)
+        os.replace(tmp, os.path.join(d, name))
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_cache_meta(path: str, meta: Dict[str, Any]) -> None:
+    write_cache_json(path, _META_FILE, meta)
+
+
+def sidecar_parquet(path: str) -> Optional[str]:
+    """
+    ingest 완료 + 원본과 stamp 일치 시 data.parquet 경로, 아니면 None.
+    """
+    meta = read_cache_meta(path)
+    if meta.get("state") != "ready":
+        return None
+    try:
+        stamp = source_stamp(path)
+    except OSError:
+        return None
+    if any(meta.get(k) != v for k, v in stamp.items()):
+        return None
+    p = os.path.join(cache_dir(path), SIDECAR_PARQUET)
+    return p if os.path.exists(p) else None
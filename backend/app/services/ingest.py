@@ -0,0 +1,381 @@
+# backend/app/services/ingest.py
+
+"""
+업로드 후 백그라운드 ingest: CSV/XLSX → 타입이 고정된 Parquet sidecar
+- 결과: datasets/.cache/<key>/data.parquet + meta.json(state/rows/원본 stamp) + schema.json
+- load_dataset 은 sidecar 가 유효하면 원본 대신 sidecar 를 읽음
+- 프로세스 내 스레드풀에서 실행, 같은 경로 중복 실행 방지
+- 여러 프로세스가 동시에 변환해도 임시파일 → rename 이라 안전
+- 변환 직후 같은 작업에서 컬럼 프로파일(profile.json)도 계산
+- XLSX: openpyxl read-only 행 스트리밍 → 배치 단위 Parquet 기록 (통째 read_excel 없음)
+- 진행률: meta.json 의 progress(0~1)/rows_done 를 주기적으로 갱신 → GET /datasets/{id}/status
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from app.config import settings
+from app.services.schema import write_schema
+from app.services.data_loader import arrow_csv_options
+from app.services.profiling import profile_dataset
+from app.services.dataset_store import (
+    SIDECAR_PARQUET, cache_dir, read_cache_meta, sidecar_parquet, source_stamp, write_cache_meta,
+)
+
+_ROW_GROUP_ROWS = 128 * 1024  # 윈도우 조회(row group seek) 단위
+_XLSX_BATCH_ROWS = 64 * 1024
+_PROGRESS_INTERVAL_S = 1.0
+
+ProgressFn = Callable[[int, Optional[float]], None]  # (처리 행 수, 진행률 0~1 | None)
+
+_executor = ThreadPoolExecutor(max_workers=max(1, int(settings.INGEST_WORKERS)), thread_name_prefix="ingest")
+_inflight: Set[str] = set()
+_lock = threading.Lock()
+
+
+def _stream_csv(src: str, dst: str, progress: ProgressFn, parse_opts: Optional[pacsv.ParseOptions] = None,
+                column_types: Optional[Dict[str, pa.DataType]] = None) -> int:
+    rows = 0
+    total_bytes = max(1, os.path.getsize(src))
+    read_opts, convert_opts = arrow_csv_options()
+    if column_types:
+        convert_opts.column_types = column_types
+    with pa.OSFile(src, "rb") as f:
+        reader = pacsv.open_csv(f, read_options=read_opts, parse_options=parse_opts, convert_options=convert_opts)
+        with pq.ParquetWriter(dst, reader.schema) as w:
+            for batch in reader:
+                w.write_batch(batch, row_group_size=_ROW_GROUP_ROWS)
+                rows += batch.num_rows
+                progress(rows, min(f.tell() / total_bytes, 1.0))
+    return rows
+
+
+_CSV_CONVERT_ERROR = re.compile(r"In CSV column #(\d+): .*CSV conversion error")
+
+
+def _csv_widen(t: pa.DataType) -> pa.DataType:
+    # 변환 실패한 컬럼 1단계 넓힘: null/정수 → float64, 그 외 → string
+    if pa.types.is_null(t) or pa.types.is_integer(t):
+        return pa.float64()
+    return pa.string()
+
+
+def _csv_to_parquet(src: str, dst: str, progress: ProgressFn) -> int:
+    """
+    pyarrow 스트리밍 CSV 리더 → ParquetWriter (배치 단위, 메모리 = 블록 몇 개, 블록 크기 = settings.CSV_BLOCK_SIZE).
+    첫 블록에서 추론한 타입이 뒤에서 깨지면(ArrowInvalid "In CSV column #i ... conversion error")
+    그 컬럼만 넓혀(_csv_widen) 처음부터 다시 스트리밍. 다른 컬럼의 추론 타입은 그대로.
+    파싱 오류(따옴표 안 개행 등)는 newlines_in_values 로 한 번 더. 파일 전체를 메모리에 올리는 폴백 없음.
+    진행률 = 읽은 바이트 / 파일 크기 (리더 선읽기만큼 앞설 수 있음)
+    """
+    parse_opts: Optional[pacsv.ParseOptions] = None
+    column_types: Dict[str, pa.DataType] = {}
+    while True:
+        try:
+            return _stream_csv(src, dst, progress, parse_opts, column_types)
+        except pa.ArrowInvalid as e:
+            m = _CSV_CONVERT_ERROR.search(str(e))
+            if m is None:
+                if parse_opts is not None:
+                    raise
+                parse_opts = pacsv.ParseOptions(newlines_in_values=True)
+                continue
+            read_opts, convert_opts = arrow_csv_options()
+            convert_opts.column_types = column_types
+            with pa.OSFile(src, "rb") as f:
+                field = pacsv.open_csv(f, read_options=read_opts, parse_options=parse_opts,
+                                       convert_options=convert_opts).schema.field(int(m.group(1)))
+            if pa.types.is_string(field.type):
+                raise
+            column_types[field.name] = _csv_widen(field.type)
+
+
+def _xlsx_header(values: tuple) -> List[str]:
+    # pd.read_excel 과 같은 규칙: 빈 헤더 → "Unnamed: i", 중복 → "name.1", "name.2" ...
+    out: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, v in enumerate(values):
+        name = f"Unnamed: {i}" if v is None or str(v).strip() == "" else str(v)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        out.append(name)
+    return out
+
+
+def _iter_xlsx_batches(src: str, batch_rows: int) -> Iterator[tuple]:
+    """
+    첫 시트를 read-only 로 행 스트리밍 → (header, rows 배치, 전체 데이터 행 수 추정 | None).
+    중간의 빈 행은 유지, 끝의 빈 행은 버림.
+    """
+    wb = openpyxl.load_workbook(src, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        total = (ws.max_row - 1) if ws.max_row else None  # 시트 dimension 기록 기반, 없으면 None
+        rows_iter = ws.iter_rows(values_only=True)
+        first = next(rows_iter, None)
+        if first is None:
+            return
+        header = _xlsx_header(first)
+        width = len(header)
+        batch: List[tuple] = []
+        blanks: List[tuple] = []
+        for r in rows_iter:
+            r = tuple(r[:width]) + (None,) * (width - len(r))
+            if all(v is None for v in r):
+                blanks.append(r)
+                continue
+            if blanks:
+                batch.extend(blanks)
+                blanks = []
+            batch.append(r)
+            if len(batch) >= batch_rows:
+                yield header, batch, total
+                batch = []
+        if batch:
+            yield header, batch, total
+    finally:
+        wb.close()
+
+
+def _widen_type(old: pa.DataType, new: pa.DataType) -> pa.DataType:
+    # 스키마 충돌 시 두 타입을 모두 담는 타입: null → 상대 타입, 정수/실수 → float64, 그 외 → string
+    if pa.types.is_null(old):
+        return new
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(f(old) for f in numeric) and any(f(new) for f in numeric):
+        return pa.float64()
+    return pa.string()
+
+
+_CONVERT_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+
+
+def _as_strings(s: pd.Series) -> pd.Series:
+    return s.map(lambda v: None if pd.isna(v) else str(v))
+
+
+def _column_array(s: pd.Series, typ: Optional[pa.DataType] = None) -> pa.Array:
+    """
+    pandas 컬럼 → arrow 배열. typ 가 string 이면 값을 문자열로 변환해서,
+    타입 지정이 없고 값이 섞여 있으면([1, 2, "A3"]) string 으로.
+    """
+    if typ is not None and pa.types.is_string(typ):
+        return pa.array(_as_strings(s), type=pa.string(), from_pandas=True)
+    try:
+        return pa.array(s, type=typ, from_pandas=True)
+    except _CONVERT_ERRORS:
+        if typ is not None:
+            raise
+        return pa.array(_as_strings(s), type=pa.string(), from_pandas=True)
+
+
+class _SchemaConflict(Exception):
+    def __init__(self, types: Dict[str, pa.DataType]):
+        super().__init__(f"schema conflict: {sorted(types)}")
+        self.types = types
+
+
+def _stream_xlsx(src: str, dst: str, progress: ProgressFn, overrides: Dict[str, pa.DataType]) -> int:
+    rows = 0
+    writer: Optional[pq.ParquetWriter] = None
+    schema: Optional[pa.Schema] = None
+    try:
+        for header, batch, total in _iter_xlsx_batches(src, _XLSX_BATCH_ROWS):
+            df = pd.DataFrame.from_records(batch, columns=header)
+            if writer is None:
+                arrays = [_column_array(df.iloc[:, i], overrides.get(c)) for i, c in enumerate(header)]
+                tbl = pa.Table.from_arrays(arrays, names=header)
+                schema = tbl.schema
+                writer = pq.ParquetWriter(dst, schema)
+            else:
+                arrays, conflicts = [], {}
+                for i, field in enumerate(schema):
+                    try:
+                        arrays.append(_column_array(df.iloc[:, i], field.type))
+                    except _CONVERT_ERRORS:
+                        conflicts[field.name] = _widen_type(field.type, _column_array(df.iloc[:, i]).type)
+                if conflicts:
+                    raise _SchemaConflict(conflicts)
+                tbl = pa.Table.from_arrays(arrays, schema=schema)
+            writer.write_table(tbl, row_group_size=_ROW_GROUP_ROWS)
+            rows += len(df)
+            progress(rows, min(rows / total, 1.0) if total else None)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("empty workbook")
+    return rows
+
+
+def _xlsx_to_parquet(src: str, dst: str, progress: ProgressFn) -> int:
+    """
+    openpyxl read-only 스트리밍 → 배치별 DataFrame → ParquetWriter.
+    스키마는 첫 배치에서 고정(배치 안에서 값이 섞인 컬럼은 string).
+    이후 배치가 그 타입으로 변환되지 않으면 충돌한 컬럼만 넓혀(_widen_type) 처음부터 다시 스트리밍.
+    """
+    overrides: Dict[str, pa.DataType] = {}
+    while True:
+        try:
+            return _stream_xlsx(src, dst, progress, overrides)
+        except _SchemaConflict as e:
+            overrides.update(e.types)
+
+
+def _frame_to_parquet(df: pd.DataFrame, dst: str) -> int:
+    # 값이 섞인 object 컬럼은 string 으로 (read_excel 결과 그대로는 arrow 변환 실패)
+    arrays = [_column_array(df.iloc[:, i]) for i in range(df.shape[1])]
+    tbl = pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+    pq.write_table(tbl, dst, row_group_size=_ROW_GROUP_ROWS)
+    return len(df)
+
+
+def _progress_writer(path: str, meta: Dict[str, Any]) -> ProgressFn:
+    # meta.json 갱신은 _PROGRESS_INTERVAL_S 마다 최대 1회
+    last = [0.0]
+
+    def _report(rows_done: int, frac: Optional[float]) -> None:
+        meta.update(rows_done=int(rows_done), progress=(round(frac, 4) if frac is not None else None))
+        now = time.monotonic()
+        if now - last[0] >= _PROGRESS_INTERVAL_S:
+            last[0] = now
+            write_cache_meta(path, meta)
+    return _report
+
+
+def convert_to_parquet(path: str) -> Dict[str, Any]:
+    """
+    원본 → sidecar data.parquet 동기 변환. meta.json 에 상태/진행률 기록.
+    .parquet 원본은 변환 불필요(원본 자체가 컬럼형).
+    """
+    ext = os.path.splitext(path)[-1].lower()
+    stamp = source_stamp(path)
+    meta: Dict[str, Any] = {**stamp, "state": "running", "source_ext": ext, "started_at": time.time()}
+    if ext == ".parquet":
+        write_schema(path, path)
+        meta.update(state="skipped", finished_at=time.time())
+        write_cache_meta(path, meta)
+        return meta
+
+    meta.update(progress=0.0, rows_done=0)
+    write_cache_meta(path, meta)
+    progress = _progress_writer(path, meta)
+    d = cache_dir(path)
+    tmp = os.path.join(d, f".{SIDECAR_PARQUET}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if ext == ".csv":
+            rows = _csv_to_parquet(path, tmp, progress)
+        elif ext == ".xlsx":
+            try:
+                rows = _xlsx_to_parquet(path, tmp, progress)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                rows = _frame_to_parquet(pd.read_excel(path), tmp)
+        elif ext == ".xls":
+            rows = _frame_to_parquet(pd.read_excel(path), tmp)
+        else:
+            raise ValueError(f"unsupported extension: {ext}")
+        os.replace(tmp, os.path.join(d, SIDECAR_PARQUET))
+        write_schema(path, os.path.join(d, SIDECAR_PARQUET))
+        meta.update(state="ready", rows=int(rows), rows_done=int(rows), progress=1.0, finished_at=time.time())
+    except Exception as e:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        meta.update(state="failed", error=str(e), finished_at=time.time())
+    write_cache_meta(path, meta)
+    return meta
+
+
+def _run(path: str) -> None:
+    try:
+        meta = convert_to_parquet(path)
+        if meta.get("state") in ("ready", "skipped"):
+            _profile(path)
+    finally:
+        with _lock:
+            _inflight.discard(path)
+
+
+def _profile(path: str) -> None:
+    try:
+        profile_dataset(path)
+    except Exception as e:
+        write_cache_meta(path, {**read_cache_meta(path), "profile_error": str(e)})
+
+
+def ingest_status(path: str) -> Dict[str, Any]:
+    """
+    변환 상태 요약 (GET /datasets/{id}/status)
+    state: none | pending | running | ready | skipped | failed
+    """
+    meta = read_cache_meta(path)
+    state = meta.get("state") or "none"
+    return {
+        "state": state,
+        "progress": 1.0 if state in ("ready", "skipped") else meta.get("progress"),
+        "rows_done": meta.get("rows_done"),
+        "rows": meta.get("rows"),
+        "error": meta.get("error"),
+        "profile_error": meta.get("profile_error"),
+    }
+
+
+def _already_columnar(path: str) -> bool:
+    # .parquet 원본은 state=skipped 로 끝남 → 원본이 그대로면 다시 예약하지 않음
+    meta = read_cache_meta(path)
+    if meta.get("state") != "skipped":
+        return False
+    try:
+        return all(meta.get(k) == v for k, v in source_stamp(path).items())
+    except OSError:
+        return False
+
+
+def schedule_ingest(path: str) -> bool:
+    """
+    백그라운드 변환 예약. 이미 유효한 sidecar 가 있거나(.parquet 원본은 처리 완료) 진행 중이면 False.
+    """
+    path = os.path.abspath(path)
+    if sidecar_parquet(path) or _already_columnar(path):
+        return False
+    with _lock:
+        if path in _inflight:
+            return False
+        _inflight.add(path)
+    write_cache_meta(path, {**source_stamp(path), "state": "pending"})
+    _executor.submit(_run, path)
+    return True
+
+
+def _run_profile(key: str, path: str) -> None:
+    try:
+        _profile(path)
+    finally:
+        with _lock:
+            _inflight.discard(key)
+
+
+def schedule_profile(path: str) -> bool:
+    """프로파일 재계산 예약 (ingest 와 같은 스레드풀). 진행 중이면 False."""
+    path = os.path.abspath(path)
+    key = f"profile:{path}"
+    with _lock:
+        if key in _inflight or path in _inflight:
+            return False
+        _inflight.add(key)
+    _executor.submit(_run_profile, key, path)
+    return True
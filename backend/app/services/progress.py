@@ -0,0 +1,105 @@
+# backend/app/services/progress.py
+
+"""
+잡 진행률/메시지 쓰기 병합 (워커 전용)
+- report(): 메모리에만 반영(같은 잡의 이전 값 덮어씀) → 백그라운드 스레드가 PROGRESS_FLUSH_MS 마다
+  대기 중인 모든 잡을 bulk_write 1회로 기록. 반복마다 report 해도 쓰기 = 잡 수 / 주기
+- status 가 바뀌는 report 는 즉시 flush (대기 중인 다른 잡도 같은 bulk_write 에)
+- 종료 상태는 finish() → 대기분을 합쳐 finish_job 으로 바로 기록, 이후 같은 잡의 늦은 report 는 무시
+- 이미 종료된 잡은 bulk 갱신 대상에서 제외(bulk_set_job_fields)
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import settings
+from app.queue_mongo import bulk_set_job_fields, finish_job
+
+log = logging.getLogger("vml.progress")
+
+_CLOSED_MAX = 1024  # 최근 종료 잡 id 보관 수 (늦게 도착한 report 무시용)
+
+
+class ProgressReporter:
+    def __init__(self, interval_ms: Optional[int] = None):
+        self.interval = max(0.0, float(settings.PROGRESS_FLUSH_MS if interval_ms is None else interval_ms) / 1000.0)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._status: Dict[str, Any] = {}  # 마지막으로 기록한 status
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # flush 순서 보장
+        self._stop = threading.Event()
+        self.writes = 0  # 실행한 bulk_write/finish 수 (지표)
+        self._thread = threading.Thread(target=self._loop, name="progress-flush", daemon=True)
+        self._thread.start()
+
+    def track(self, job_id: str) -> None:
+        # (재)클레임한 잡: 이전 종료 기록을 지워 report 를 다시 받음
+        with self._lock:
+            self._closed.pop(job_id, None)
+
+    def report(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            if job_id in self._closed:
+                return
+            self._pending.setdefault(job_id, {}).update(fields)
+            urgent = "status" in fields and fields["status"] != self._status.get(job_id)
+        if urgent or self.interval == 0:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                for job_id, fields in batch.items():
+                    if "status" in fields:
+                        self._status[job_id] = fields["status"]
+            if not batch:
+                return 0
+            try:
+                n = bulk_set_job_fields(batch)
+                self.writes += 1
+                return n
+            except Exception:
+                log.exception("progress flush failed (%d jobs)", len(batch))
+                with self._lock:  # 다음 flush 에서 재시도 (그 사이 들어온 값이 우선)
+                    for job_id, fields in batch.items():
+                        if job_id not in self._closed:
+                            self._pending[job_id] = {**fields, **self._pending.get(job_id, {})}
+                return 0
+
+    def finish(self, job_id: str, worker_id: str, status: str, fields: Optional[Dict[str, Any]] = None) -> bool:
+        """종료 전이: 대기 중인 진행률 + fields 를 finish_job 으로 즉시 기록 (소유 워커만 반영)"""
+        with self._lock:
+            pending = self._close(job_id)
+        with self._write_lock:
+            self.writes += 1
+            return finish_job(job_id, worker_id, status, {**pending, **(fields or {})})
+
+    def drop(self, job_id: str) -> None:
+        """결과 없이 손을 뗀 잡(재큐잉 등): 대기 중인 진행률을 버리고 이후 report 도 무시 (진행 중인 flush 는 끝날 때까지 대기)"""
+        with self._write_lock, self._lock:
+            self._close(job_id)
+
+    def _close(self, job_id: str) -> Dict[str, Any]:
+        # self._lock 안에서 호출: 대기분을 꺼내고 이후 report 를 막음
+        pending = self._pending.pop(job_id, {})
+        self._status.pop(job_id, None)
+        self._closed[job_id] = None
+        while len(self._closed) > _CLOSED_MAX:
+            self._closed.popitem(last=False)
+        return pending
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.flush()
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0.05))
@@ -0,0 +1,183 @@
+# backend/app/services/run_events.py
+
+"""
+실행(잡) 상태 push: GET /runs/stream (SSE) 의 공용 구독 허브
+- 프로세스당 백그라운드 스레드 1개가 jobs 변경을 감시 → 해당 run_id 구독자 큐로 fan-out
+  · change stream (replica set/sharded): status/progress/message 가 바뀐 이벤트만 수신,
+    끊기면 resume token 으로 이어받음
+  · change stream 미지원(standalone mongod 등) → 폴링 fallback:
+    RUN_EVENTS_POLL_SECONDS 마다 구독 중인 run_id 전체를 $in 1회 조회, 바뀐 필드만 전달
+- Mongo/API 부하 = 실제 변경 수(폴링 시 주기당 쿼리 1개), 접속자 × run 수와 무관
+- 구독자 = asyncio.Queue (감시 스레드 → 이벤트 루프는 call_soon_threadsafe)
+"""
+from __future__ import annotations
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import threading
+
+from pymongo.errors import OperationFailure, PyMongoError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.config import settings
+from app.queue_mongo import RUN_STATUS_FIELDS, TERMINAL_STATUSES, get_jobs, watch_job_status
+
+MAX_STREAM_IDS = 200
+SNAPSHOT_FIELDS = list(RUN_STATUS_FIELDS) + ["task_ref", "dataset_original_name"]
+
+_RETRY_S = 2.0
+
+log = logging.getLogger("vml.run_events")
+
+
+class _Subscriber:
+    __slots__ = ("ids", "queue", "loop")
+
+    def __init__(self, ids: Set[str], loop: asyncio.AbstractEventLoop):
+        self.ids = ids
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.loop = loop
+
+
+class RunEventHub:
+    def __init__(self):
+        self.mode = "idle"  # idle | change_stream | polling
+        self._subs: Set[_Subscriber] = set()
+        self._last: Dict[str, Dict[str, Any]] = {}  # run_id → 마지막으로 보낸 상태 (중복 제거)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------------------------------------------------
+    def subscribe(self, run_ids: List[str]) -> _Subscriber:
+        sub = _Subscriber(set(run_ids), asyncio.get_running_loop())
+        with self._lock:
+            self._subs.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="run-events", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+            watched = self._watched()
+            for rid in [r for r in self._last if r not in watched]:
+                del self._last[rid]
+
+    def seed(self, runs: Dict[str, Dict[str, Any]]) -> None:
+        # snapshot 으로 보낸 값 = 이미 보낸 상태 (폴링 첫 조회가 같은 값을 다시 보내지 않도록)
+        with self._lock:
+            for rid, doc in runs.items():
+                last = self._last.setdefault(rid, {})
+                for f in RUN_STATUS_FIELDS:
+                    last.setdefault(f, doc.get(f))
+
+    def _watched(self) -> Set[str]:
+        return set().union(*(s.ids for s in self._subs)) if self._subs else set()
+
+    def _publish(self, run_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            targets = [s for s in self._subs if run_id in s.ids]
+            if not targets:
+                return
+            last = self._last.setdefault(run_id, {})
+            delta = {k: v for k, v in fields.items() if last.get(k, ...) != v}
+            if not delta:
+                return
+            last.update(delta)
+        for s in targets:
+            s.loop.call_soon_threadsafe(s.queue.put_nowait, (run_id, delta))
+
+    # -------------------------------------------------------------------
+    def _run(self) -> None:
+        try:
+            self._watch()
+        except Exception as e:
+            log.info("change stream unavailable (%s); polling every %ss", e, settings.RUN_EVENTS_POLL_SECONDS)
+            self._poll()
+
+    def _watch(self) -> None:
+        resume = None
+        while True:
+            try:
+                with watch_job_status(resume_after=resume) as stream:
+                    self.mode = "change_stream"
+                    while stream.alive:
+                        change = stream.try_next()
+                        resume = stream.resume_token
+                        if change is None:
+                            continue
+                        doc = change.get("fullDocument") or \
+                            (change.get("updateDescription") or {}).get("updatedFields") or {}
+                        self._publish(str(change["documentKey"]["_id"]),
+                                      {f: doc[f] for f in RUN_STATUS_FIELDS if f in doc})
+            except OperationFailure:
+                if self.mode != "change_stream":
+                    raise  # 처음부터 미지원 → 폴링
+                resume = None  # resume token 만료(oplog 회전) 등 → 새로 시작
+            except PyMongoError:
+                pass  # 네트워크/선출 → 잠시 후 resume token 으로 재개
+            threading.Event().wait(_RETRY_S)
+
+    def _poll(self) -> None:
+        self.mode = "polling"
+        interval = float(settings.RUN_EVENTS_POLL_SECONDS)
+        while True:
+            with self._lock:
+                ids = list(self._watched())
+            if ids:
+                try:
+                    for j in get_jobs(ids, list(RUN_STATUS_FIELDS)):
+                        self._publish(str(j["_id"]), {f: j.get(f) for f in RUN_STATUS_FIELDS})
+                except PyMongoError:
+                    pass
+            threading.Event().wait(interval)
+
+
+hub = RunEventHub()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_run_events(request: Request, run_ids: List[str]) -> AsyncIterator[str]:
+    """
+    SSE 본문: 최초 snapshot(구독한 run 전체) → 이후 status 이벤트(바뀐 필드만, 큐에 쌓인 것은 run 별로 병합)
+    구독한 run 이 모두 종료 상태가 되면 end 이벤트 후 종료. 없는 run_id 는 무시.
+    """
+    sub = hub.subscribe(run_ids)  # snapshot 전에 구독 → 그 사이 변경도 놓치지 않음
+    try:
+        docs = await run_in_threadpool(get_jobs, run_ids, SNAPSHOT_FIELDS)
+        status: Dict[str, Any] = {}
+        snapshot: Dict[str, Any] = {}
+        for j in docs:
+            rid = str(j.pop("_id"))
+            snapshot[rid] = j
+            status[rid] = j.get("status")
+        sub.ids &= set(snapshot)
+        hub.seed(snapshot)
+        yield "retry: 3000\n" + _sse("snapshot", {"mode": hub.mode, "runs": snapshot})
+
+        keepalive = float(settings.RUN_STREAM_KEEPALIVE_SECONDS)
+        while status and not all(s in TERMINAL_STATUSES for s in status.values()):
+            try:
+                rid, delta = await asyncio.wait_for(sub.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            batch: Dict[str, Dict[str, Any]] = {rid: dict(delta)}
+            while not sub.queue.empty():
+                rid, delta = sub.queue.get_nowait()
+                batch.setdefault(rid, {}).update(delta)
+            for rid, delta in batch.items():
+                if "status" in delta:
+                    status[rid] = delta["status"]
+            yield _sse("status", batch)
+        yield _sse("end", {"runs": list(status)})
+    finally:
+        hub.unsubscribe(sub)
@@ -0,0 +1,82 @@
+# backend/app/services/sampling.py
+
+"""
+학습용 샘플링 (model_params["_sampling"])
+- stratified_cap: {"method": "stratified_cap", "cap_per_class": N}
+  클래스(target 값)별 최대 N 행. 전체 적재 없이 배치 스트리밍 + 클래스별 reservoir.
+  각 행에 seed(split.random_state) 고정 난수 키를 부여하고 클래스별로 키가 가장 작은 N 개만 유지
+  → 클래스 내 균등 표본, 같은 데이터/seed 면 배치 크기와 무관하게 같은 결과.
+  피크 메모리 = 배치 1개 + (클래스 수 × N) 행.
+- target 이 결측인 행은 제외 (학습에서도 사용 불가)
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.data_loader import columns_for_task, filters_for_task, iter_frames, load_dataset
+
+BATCH_ROWS = 128 * 1024
+
+_KEY = "__sample_key"
+_ROW = "__sample_row"
+
+
+def stratified_cap_sample(
+    uri: str,
+    target: str,
+    cap_per_class: int,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[List[Any]]] = None,
+    random_state: Optional[int] = 42,
+    batch_rows: int = BATCH_ROWS,
+) -> pd.DataFrame:
+    """클래스별 최대 cap_per_class 행 표본 (원본 행 순서 유지)"""
+    cap = int(cap_per_class)
+    if cap <= 0:
+        raise ValueError("cap_per_class must be > 0")
+    if columns and target not in columns:
+        columns = list(columns) + [target]
+
+    # Generator.random(n) 을 이어 호출한 난수열 = 한 번에 뽑은 난수열 → 배치 경계와 무관
+    rng = np.random.default_rng(random_state)
+    kept: Optional[pd.DataFrame] = None
+    seen = 0
+    for df in iter_frames(uri, columns=columns, batch_rows=batch_rows, filters=filters):
+        n = len(df)
+        df = df.assign(**{_KEY: rng.random(n), _ROW: np.arange(seen, seen + n)})
+        seen += n
+        df = df[df[target].notna()]
+        merged = df if kept is None else pd.concat([kept, df], ignore_index=True)
+        kept = merged.sort_values(_KEY, kind="stable").groupby(target, sort=False, observed=True).head(cap)
+
+    if kept is None:
+        return pd.DataFrame(columns=columns or [])
+    return kept.sort_values(_ROW).drop(columns=[_KEY, _ROW]).reset_index(drop=True)
+
+
+def load_task_frame(uri: str, task_ref: Dict[str, Any], cache: bool = True) -> pd.DataFrame:
+    """
+    태스크 학습 데이터: 컬럼 projection + 행 필터 + _sampling 적용.
+    샘플링이 없으면 load_dataset(cache=True 면 캐시 공유 프레임이므로 호출측에서 수정 금지).
+    cache=False: 프로세스 캐시에 남기지 않음 (잡마다 한 번 읽고 버리는 워커 학습 경로)
+    """
+    task_ref = task_ref or {}
+    columns = columns_for_task(task_ref)
+    filters = filters_for_task(task_ref)
+    sampling = (task_ref.get("model_params") or {}).get("_sampling")
+    if not sampling:
+        return load_dataset(uri, columns=columns, filters=filters, cache=cache)
+
+    method = sampling.get("method")
+    if method == "stratified_cap":
+        return stratified_cap_sample(
+            uri,
+            target=task_ref.get("target"),
+            cap_per_class=int(sampling.get("cap_per_class") or 10000),
+            columns=columns,
+            filters=filters,
+            random_state=(task_ref.get("split") or {}).get("random_state", 42),
+        )
+    raise ValueError(f"unsupported sampling method: {method}")
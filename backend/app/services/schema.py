@@ -0,0 +1,100 @@
+# backend/app/services/schema.py
+
+"""
+데이터셋 스키마(컬럼/dtype/행 수)
+- ingest 완료 시 Parquet 메타데이터로 1회 계산 → .cache/<key>/schema.json 저장
+- 조회는 (경로, mtime, size) 키의 프로세스 내 캐시 → 디스크 → 계산 순
+- ingest 전이면 미리보기 행으로 컬럼/dtype 만 추정(row_count=None, 캐시하지 않음)
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import os
+import json
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services.dataset_store import cache_dir, sidecar_parquet, source_stamp, write_cache_json
+from app.services.data_loader import load_preview
+
+_SCHEMA_FILE = "schema.json"
+_CACHE_MAX = 256
+
+_cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _has_nulls(md, col_idx: int) -> bool:
+    for rg in range(md.num_row_groups):
+        st = md.row_group(rg).column(col_idx).statistics
+        if st is None or not st.has_null_count or st.null_count:
+            return True
+    return False
+
+
+def schema_from_parquet(path: str) -> Dict[str, Any]:
+    pf = pq.ParquetFile(path)
+    arrow_schema = pf.schema_arrow
+    dtypes = {str(c): str(t) for c, t in arrow_schema.empty_table().to_pandas().dtypes.items()}
+    # 결측이 있는 정수 컬럼은 pandas 로드 시 float64 가 되므로 동일하게 표기
+    for i, field in enumerate(arrow_schema):
+        if pa.types.is_integer(field.type) and _has_nulls(pf.metadata, i):
+            dtypes[str(field.name)] = "float64"
+    return {
+        "columns": list(dtypes.keys()),
+        "dtypes": dtypes,
+        "row_count": int(pf.metadata.num_rows),
+        "source": "parquet",
+    }
+
+
+def write_schema(path: str, columnar_path: str) -> Dict[str, Any]:
+    """ingest 단계에서 호출: 컬럼형 파일(sidecar 또는 원본 parquet)로 스키마 계산/저장"""
+    sch = {**schema_from_parquet(columnar_path), **source_stamp(path)}
+    write_cache_json(path, _SCHEMA_FILE, sch)
+    return sch
+
+
+def _read_persisted(path: str, stamp: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(cache_dir(path), _SCHEMA_FILE), "r", encoding="utf-8") as f:
+            sch = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if any(sch.get(k) != v for k, v in stamp.items()):
+        return None
+    return sch
+
+
+def get_schema(path: str) -> Dict[str, Any]:
+    path = os.path.abspath(path)
+    stamp = source_stamp(path)
+    key = (path, stamp["source_mtime_ns"], stamp["source_size"])
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+
+    sch = _read_persisted(path, stamp)
+    if sch is None:
+        columnar = path if path.lower().endswith(".parquet") else sidecar_parquet(path)
+        if columnar:
+            sch = write_schema(path, columnar)
+        else:
+            df = load_preview(f"file://{path}", 50)
+            return {
+                "columns": [str(c) for c in df.columns],
+                "dtypes": {str(c): str(t) for c, t in df.dtypes.items()},
+                "row_count": None,
+                "source": "preview",
+            }
+
+    with _lock:
+        _cache[key] = sch
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return sch
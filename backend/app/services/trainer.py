@@ -0,0 +1,249 @@
+# backend/app/services/trainer.py
+
+"""
+학습 잡 실행 (워커 프로세스 풀 안에서 호출)
+- 데이터: sampling.load_task_frame (features/target projection + _filters + _sampling)
+- 전처리: 수치 = 결측 median 대체, 범주/문자열 = 최빈값 대체 + one-hot(상위 범주), 날짜 = epoch 초
+- 모델: model_family 별 sklearn 추정기. xgboost/lightgbm/catboost 는 설치돼 있으면 사용,
+  없으면 sklearn HistGradientBoosting 으로 대체(message 에 기록)
+- 결과: MLflow run 에 params/metrics + models/<family>/metrics/summary.json, confusion_matrix.json
+- 진행률/메시지: 워커 프로세스 풀에서는 부모의 ProgressReporter 로 전달(set_progress_sink 의 큐),
+  단독 실행 시 프로세스 내 ProgressReporter. 어느 쪽이든 병합 후 주기적으로 기록
+- 취소 요청은 단계 사이마다 확인
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import ast
+import time
+
+import numpy as np
+import pandas as pd
+import mlflow
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from app.queue_mongo import get_job
+from app.services.metrics import basic_classification_metrics
+from app.services.sampling import load_task_frame
+
+MAX_ONEHOT_CATEGORIES = 32
+
+
+class JobCanceled(Exception):
+    pass
+
+
+_progress_sink = None  # 워커 자식 프로세스: 부모로 가는 multiprocessing 큐
+_reporter = None
+
+
+def set_progress_sink(q) -> None:
+    global _progress_sink
+    _progress_sink = q
+
+
+def _report(job_id: str, progress: float, message: str) -> None:
+    global _reporter
+    fields = {"progress": float(progress), "message": message}
+    if _progress_sink is not None:
+        _progress_sink.put((job_id, fields))
+        return
+    if _reporter is None:
+        from app.services.progress import ProgressReporter
+        _reporter = ProgressReporter()
+    _reporter.report(job_id, **fields)
+
+
+def _check_cancel(job_id: str) -> None:
+    j = get_job(job_id) or {}
+    if j.get("cancel_requested"):
+        raise JobCanceled("canceled")
+
+
+# -------------------------------------------------------------------
+# 데이터 준비
+# -------------------------------------------------------------------
+def _prepare_xy(df: pd.DataFrame, target: str, features: Optional[List[str]]) -> Tuple[pd.DataFrame, pd.Series]:
+    if target not in df.columns:
+        raise ValueError(f"target column not found: {target}")
+    df = df[df[target].notna()]
+    cols = [c for c in (features or df.columns) if c != target]
+    X = df[cols].copy()
+    for c in X.columns:
+        if pd.api.types.is_datetime64_any_dtype(X[c].dtype):
+            X[c] = X[c].astype("int64") / 1e9
+        elif pd.api.types.is_bool_dtype(X[c].dtype):
+            X[c] = X[c].astype("float64")
+    return X, df[target]
+
+
+def _preprocessor(X: pd.DataFrame, scale: bool) -> ColumnTransformer:
+    num = [c for c in X.columns if pd.api.types.is_numeric_dtype(X[c].dtype)]
+    cat = [c for c in X.columns if c not in num]
+    num_steps = [SimpleImputer(strategy="median")] + ([StandardScaler()] if scale else [])
+    return ColumnTransformer([
+        ("num", make_pipeline(*num_steps), num),
+        ("cat", make_pipeline(
+            SimpleImputer(strategy="most_frequent"),
+            OneHotEncoder(handle_unknown="infrequent_if_exist", max_categories=MAX_ONEHOT_CATEGORIES,
+                          sparse_output=False),
+        ), cat),
+    ])
+
+
+# -------------------------------------------------------------------
+# 추정기
+# -------------------------------------------------------------------
+def _coerce_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    # UI 는 "(128, 64)" 같은 문자열로 보낼 수 있음
+    out: Dict[str, Any] = {}
+    for k, v in (params or {}).items():
+        if k.startswith("_"):
+            continue
+        if isinstance(v, str) and v[:1] in "([{":
+            try:
+                v = ast.literal_eval(v)
+            except (ValueError, SyntaxError):
+                pass
+        out[k] = v
+    return out
+
+
+def _sklearn_estimator(family: str, task_type: str):
+    from sklearn import ensemble, linear_model, neighbors, neural_network, svm
+
+    clf = task_type == "classification"
+    table = {
+        "randomforest": ensemble.RandomForestClassifier if clf else ensemble.RandomForestRegressor,
+        "logreg": linear_model.LogisticRegression if clf else None,
+        "svm": svm.SVC if clf else svm.SVR,
+        "elasticnet": None if clf else linear_model.ElasticNet,
+        "knn": neighbors.KNeighborsClassifier if clf else neighbors.KNeighborsRegressor,
+        "mlp": neural_network.MLPClassifier if clf else neural_network.MLPRegressor,
+        "hgb": ensemble.HistGradientBoostingClassifier if clf else ensemble.HistGradientBoostingRegressor,
+    }
+    cls = table.get(family)
+    if cls is None:
+        raise ValueError(f"model_family '{family}' does not support {task_type}")
+    return cls()
+
+
+def _boosting_estimator(family: str, task_type: str):
+    clf = task_type == "classification"
+    try:
+        if family == "xgboost":
+            import xgboost
+            return xgboost.XGBClassifier() if clf else xgboost.XGBRegressor()
+        if family == "lightgbm":
+            import lightgbm
+            return lightgbm.LGBMClassifier(verbose=-1) if clf else lightgbm.LGBMRegressor(verbose=-1)
+        if family == "catboost":
+            import catboost
+            return catboost.CatBoostClassifier(verbose=0) if clf else catboost.CatBoostRegressor(verbose=0)
+    except ImportError:
+        return None
+    raise ValueError(f"unknown model_family: {family}")
+
+
+def build_estimator(family: str, task_type: str, params: Dict[str, Any]) -> Tuple[Any, bool, str]:
+    """(추정기, 스케일링 필요 여부, 비고 메시지)"""
+    family = (family or "xgboost").lower()
+    note = ""
+    if family in ("xgboost", "lightgbm", "catboost"):
+        est = _boosting_estimator(family, task_type)
+        if est is None:
+            est = _sklearn_estimator("hgb", task_type)
+            note = f"{family} not installed; used HistGradientBoosting"
+    else:
+        est = _sklearn_estimator(family, task_type)
+    accepted = est.get_params()
+    est.set_params(**{k: v for k, v in _coerce_params(params).items() if k in accepted})
+    return est, family in ("logreg", "svm", "elasticnet", "knn", "mlp"), note
+
+
+# -------------------------------------------------------------------
+# 평가
+# -------------------------------------------------------------------
+def _evaluate(model: Pipeline, X_test: pd.DataFrame, y_test: pd.Series, task_type: str) -> Dict[str, Any]:
+    y_pred = model.predict(X_test)
+    if task_type == "classification":
+        proba = None
+        if hasattr(model, "predict_proba") and y_test.nunique() == 2:
+            try:
+                proba = model.predict_proba(X_test)[:, 1]
+            except Exception:
+                proba = None
+        return basic_classification_metrics(np.asarray(y_test), np.asarray(y_pred), proba)
+    return {
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "mae": float(mean_absolute_error(y_test, y_pred)),
+        "r2": float(r2_score(y_test, y_pred)),
+    }
+
+
+# -------------------------------------------------------------------
+# 엔트리 (ProcessPoolExecutor 에서 pickle 가능한 최상위 함수)
+# -------------------------------------------------------------------
+def run_training(job_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    잡 1개 학습 → finish_job 에 넘길 필드 {"metrics", "mlflow", "artifacts", "message", "progress"}.
+    취소 요청 시 JobCanceled.
+    """
+    t0 = time.perf_counter()
+    task_ref = job.get("task_ref") or {}
+    task_type = task_ref.get("task_type") or "classification"
+    target = task_ref.get("target")
+    family = (task_ref.get("model_family") or "xgboost").lower()
+    split = task_ref.get("split") or {}
+    model_params = task_ref.get("model_params") or {}
+
+    _report(job_id, 0.05, "loading data")
+    # 풀 프로세스마다 FrameCache(최대 DATAFRAME_CACHE_BYTES)를 붙잡지 않도록 캐시 없이 읽음
+    df = load_task_frame(job["dataset_uri"], task_ref, cache=False)
+    X, y = _prepare_xy(df, target, model_params.get("_features"))
+    del df
+    _check_cancel(job_id)
+
+    _report(job_id, 0.2, f"splitting {len(X):,} rows")
+    random_state = split.get("random_state", 42)
+    stratify = None
+    if task_type == "classification" and y.value_counts().min() >= 2:
+        stratify = y
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=float(split.get("test_size", 0.2)), random_state=random_state, stratify=stratify,
+    )
+
+    est, scale, note = build_estimator(family, task_type, model_params)
+    model = Pipeline([("prep", _preprocessor(X_train, scale)), ("model", est)])
+    _check_cancel(job_id)
+
+    _report(job_id, 0.3, f"training {family}" + (f" ({note})" if note else ""))
+    model.fit(X_train, y_train)
+    _check_cancel(job_id)
+
+    _report(job_id, 0.85, "evaluating")
+    metrics = _evaluate(model, X_test, y_test, task_type)
+    summary = {k: v for k, v in metrics.items() if isinstance(v, (int, float))}
+
+    _report(job_id, 0.95, "logging to mlflow")
+    mlflow.set_tracking_uri(job.get("mlflow_uri"))
+    with mlflow.start_run(run_name=f"{family}-{task_ref.get('task_id')}") as run:
+        mlflow.log_params({k: str(v) for k, v in _coerce_params(est.get_params()).items()})
+        mlflow.log_metrics(summary)
+        mlflow.log_dict(summary, f"models/{family}/metrics/summary.json")
+        if "confusion_matrix" in metrics:
+            mlflow.log_dict({"matrix": metrics["confusion_matrix"]}, f"models/{family}/confusion_matrix.json")
+        mlflow_run_id = run.info.run_id
+
+    return {
+        "progress": 1.0,
+        "message": note or "done",
+        "metrics": summary,
+        "mlflow": {"run_id": mlflow_run_id},
+        "artifacts": {"models": [family]},
+        "elapsed_s": round(time.perf_counter() - t0, 2),
+    }
@@ -0,0 +1,199 @@
+# backend/app/services/upload_sessions.py
+
+"""
+재개 가능한 청크 업로드 세션 (ARTIFACT_ROOT/uploads/<upload_id>/)
+- init: session.json 기록 (파일명/확장자/총 크기/청크 크기/총 청크 수)
+- PUT chunk N: <N>.chunk 로 원자적 저장 (같은 N 재전송 시 덮어씀 → 재시도 안전)
+- status: 수신 완료 청크 목록 → 클라이언트는 빠진 청크만 재전송
+- finalize: 청크를 순서대로 스트리밍 결합 → dataset_store.save_stream
+세션 상태가 디스크에 있으므로 API 프로세스가 여러 개여도 동일하게 동작.
+"""
+from __future__ import annotations
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import os
+import json
+import math
+import shutil
+import time
+from uuid import uuid4
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services.dataset_store import ALLOWED_EXTS, iter_file_chunks, save_stream
+
+_SESSION_FILE = "session.json"
+_CHUNK_SUFFIX = ".chunk"
+_WRITE_BUFFER = 1024 * 1024  # write_chunk: 스레드풀 쓰기 1회당 최소 크기
+
+
+class UploadSessionError(ValueError):
+    pass
+
+
+def _sessions_dir() -> str:
+    d = os.path.join(settings.ARTIFACT_ROOT, "uploads")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _session_dir(upload_id: str) -> str:
+    # upload_id 는 uuid hex 만 허용 (경로 탈출 방지)
+    if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+        raise UploadSessionError("invalid upload_id")
+    return os.path.join(_sessions_dir(), upload_id)
+
+
+def _chunk_path(sdir: str, index: int) -> str:
+    return os.path.join(sdir, f"{index:08d}{_CHUNK_SUFFIX}")
+
+
+def _purge_stale_sessions() -> None:
+    ttl = float(settings.UPLOAD_SESSION_TTL_HOURS) * 3600.0
+    cutoff = time.time() - ttl
+    root = _sessions_dir()
+    for name in os.listdir(root):
+        sdir = os.path.join(root, name)
+        try:
+            if os.path.isdir(sdir) and os.path.getmtime(sdir) < cutoff:
+                shutil.rmtree(sdir, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def load_session(upload_id: str) -> Optional[Dict[str, Any]]:
+    sdir = _session_dir(upload_id)
+    try:
+        with open(os.path.join(sdir, _SESSION_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def init_session(filename: str, size: int) -> Dict[str, Any]:
+    ext = os.path.splitext(filename or "")[-1].lower()
+    if ext not in ALLOWED_EXTS:
+        raise UploadSessionError("Only .csv, .xlsx, .parquet allowed")
+    size = int(size)
+    if size <= 0:
+        raise UploadSessionError("size must be > 0")
+
+    _purge_stale_sessions()
+    chunk_size = int(settings.UPLOAD_CHUNK_BYTES)
+    meta = {
+        "upload_id": uuid4().hex,
+        "filename": filename,
+        "ext": ext,
+        "size": size,
+        "chunk_size": chunk_size,
+        "total_chunks": int(math.ceil(size / chunk_size)),
+        "created_at": time.time(),
+    }
+    sdir = _session_dir(meta["upload_id"])
+    os.makedirs(sdir, exist_ok=True)
+    with open(os.path.join(sdir, _SESSION_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def received_chunks(upload_id: str) -> List[int]:
+    sdir = _session_dir(upload_id)
+    out: List[int] = []
+    for name in os.listdir(sdir):
+        if name.endswith(_CHUNK_SUFFIX):
+            out.append(int(name[: -len(_CHUNK_SUFFIX)]))
+    return sorted(out)
+
+
+def session_status(upload_id: str) -> Optional[Dict[str, Any]]:
+    meta = load_session(upload_id)
+    if not meta:
+        return None
+    received = received_chunks(upload_id)
+    sdir = _session_dir(upload_id)
+    bytes_received = sum(os.path.getsize(_chunk_path(sdir, i)) for i in received)
+    return {**meta, "received": received, "bytes_received": bytes_received}
+
+
+def _expected_chunk_bytes(meta: Dict[str, Any], index: int) -> int:
+    if index == meta["total_chunks"] - 1:
+        return meta["size"] - meta["chunk_size"] * index
+    return meta["chunk_size"]
+
+
+async def write_chunk(upload_id: str, index: int, body: AsyncIterator[bytes]) -> Dict[str, Any]:
+    """
+    요청 본문 스트림 → <index>.chunk.part → 크기 검증 → rename.
+    파일 I/O 는 스레드풀에서 (이벤트 루프를 막지 않도록), 본문 조각은 _WRITE_BUFFER 단위로 모아 씀.
+    """
+    meta = await run_in_threadpool(load_session, upload_id)
+    if not meta:
+        raise KeyError(upload_id)
+    index = int(index)
+    if not (0 <= index < meta["total_chunks"]):
+        raise UploadSessionError(f"chunk index out of range (0..{meta['total_chunks'] - 1})")
+
+    sdir = _session_dir(upload_id)
+    final = _chunk_path(sdir, index)
+    tmp = f"{final}.{uuid4().hex}.part"
+    written = 0
+    buf = bytearray()
+    try:
+        out = await run_in_threadpool(open, tmp, "wb")
+        try:
+            async for piece in body:
+                written += len(piece)
+                if written > meta["chunk_size"]:
+                    raise UploadSessionError("chunk larger than chunk_size")
+                buf += piece
+                if len(buf) >= _WRITE_BUFFER:
+                    await run_in_threadpool(out.write, bytes(buf))
+                    buf.clear()
+            if buf:
+                await run_in_threadpool(out.write, bytes(buf))
+        finally:
+            await run_in_threadpool(out.close)
+        expected = _expected_chunk_bytes(meta, index)
+        if written != expected:
+            raise UploadSessionError(f"chunk {index} size mismatch ({written} != {expected})")
+        await run_in_threadpool(os.replace, tmp, final)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    await run_in_threadpool(os.utime, sdir)  # TTL 기준 갱신
+    return {"upload_id": upload_id, "index": index, "bytes": written}
+
+
+def _iter_session_bytes(sdir: str, total_chunks: int) -> Iterator[bytes]:
+    for i in range(total_chunks):
+        with open(_chunk_path(sdir, i), "rb") as f:
+            yield from iter_file_chunks(f)
+
+
+def finalize_session(upload_id: str) -> Dict[str, Any]:
+    """
+    모든 청크 수신 확인 → 순서대로 결합 저장 → 세션 디렉터리 삭제.
+    반환: save_stream 결과 + filename
+    """
+    meta = load_session(upload_id)
+    if not meta:
+        raise KeyError(upload_id)
+    missing = sorted(set(range(meta["total_chunks"])) - set(received_chunks(upload_id)))
+    if missing:
+        raise UploadSessionError(f"missing chunks: {missing[:20]}")
+
+    sdir = _session_dir(upload_id)
+    info = save_stream(_iter_session_bytes(sdir, meta["total_chunks"]), meta["ext"])
+    shutil.rmtree(sdir, ignore_errors=True)
+    return {**info, "filename": meta["filename"]}
+
+
+def abort_session(upload_id: str) -> bool:
+    sdir = _session_dir(upload_id)
+    if not os.path.isdir(sdir):
+        return False
+    shutil.rmtree(sdir, ignore_errors=True)
+    return True
@@ -1,7 +1,7 @@
 # backend/app/store_sql.py
 
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from sqlmodel import Session, select
 from uuid import uuid4
@@ -62,6 +62,13 @@ class Repo:
     def get_analysis(self, analysis_id: str) -> Optional[Analysis]:
         return self.s.get(Analysis, analysis_id)
 
+    def get_analyses(self, analysis_ids: List[str]) -> Dict[str, Analysis]:
+        # IN 쿼리 1회, 없는 id 는 결과에서 빠짐
+        if not analysis_ids:
+            return {}
+        rows = self.s.exec(select(Analysis).where(Analysis.id.in_(list(set(analysis_ids))))).all()
+        return {r.id: r for r in rows}
+
     # Tasks
     def create_task(self, analysis_id: str, task_type: str, target: str, model_family: str, split: dict, model_params: dict) -> dict:
         t = MLTask(
@@ -82,6 +89,13 @@ class Repo:
     def get_task(self, task_id: str) -> Optional[MLTask]:
         return self.s.get(MLTask, task_id)
 
+    def get_tasks(self, task_ids: List[str]) -> Dict[str, MLTask]:
+        # IN 쿼리 1회, 없는 id 는 결과에서 빠짐
+        if not task_ids:
+            return {}
+        rows = self.s.exec(select(MLTask).where(MLTask.id.in_(list(set(task_ids))))).all()
+        return {r.id: r for r in rows}
+
     # Users
     def get_user_by_email(self, email: str) -> Optional[User]:
         return self.s.exec(select(User).where(User.email == email)).first()
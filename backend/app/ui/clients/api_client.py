@@ -4,8 +4,9 @@
 import os
 import io
 import base64
+import time
 import requests
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional
 
 # 백엔드 호스트 (프록시 없이 직접 접근 시)
 API_DIR = os.getenv("API_DIR", "http://127.0.0.1:8065").rstrip("/")
@@ -60,12 +61,91 @@ def upload_file_from_contents(contents: str, filename: str, token: Optional[str]
     r.raise_for_status()
     return r.json()
 
+def create_upload_session(filename: str, size: int, token: Optional[str] = None) -> Dict[str, Any]:
+    payload = {"filename": filename, "size": int(size)}
+    r = requests.post(_url("/uploads"), json=payload, headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()  # {upload_id, chunk_size, total_chunks, size}
+
+def get_upload_session(upload_id: str, token: Optional[str] = None) -> Dict[str, Any]:
+    r = requests.get(_url(f"/uploads/{upload_id}"), headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()  # {..., received: [chunk idx...], bytes_received}
+
+def put_upload_chunk(upload_id: str, index: int, data: bytes, token: Optional[str] = None) -> Dict[str, Any]:
+    r = requests.put(_url(f"/uploads/{upload_id}/chunks/{int(index)}"), data=data,
+                     headers=_headers(token, {"Content-Type": "application/octet-stream"}), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()
+
+def complete_upload_session(upload_id: str, token: Optional[str] = None) -> Dict[str, Any]:
+    r = requests.post(_url(f"/uploads/{upload_id}/complete"), headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()  # {dataset_uri, original_name, bytes_written, elapsed_ms}
+
+def upload_file_resumable(fp: BinaryIO, filename: str, size: int, token: Optional[str] = None,
+                          upload_id: Optional[str] = None, retries: int = 3) -> Dict[str, Any]:
+    """
+    파일 객체 → 업로드 세션 청크 전송 (파이썬 측 사용/스크립트용).
+    upload_id 를 주면 서버에 없는 청크만 재전송(재개). 청크 단위 재시도.
+    """
+    if upload_id:
+        sess = get_upload_session(upload_id, token=token)
+        done = set(sess.get("received") or [])
+    else:
+        sess = create_upload_session(filename, size, token=token)
+        done = set()
+    chunk_size = int(sess["chunk_size"])
+    for i in range(int(sess["total_chunks"])):
+        if i in done:
+            continue
+        fp.seek(i * chunk_size)
+        data = fp.read(chunk_size)
+        for attempt in range(retries + 1):
+            try:
+                put_upload_chunk(sess["upload_id"], i, data, token=token)
+                break
+            except requests.RequestException:
+                if attempt >= retries:
+                    raise
+                time.sleep(2 ** attempt)
+    return complete_upload_session(sess["upload_id"], token=token)
+
 def preview_dataset(dataset_uri: str, limit: int = 50, token: Optional[str] = None) -> Dict[str, Any]:
     payload = {"dataset_uri": dataset_uri, "limit": int(limit)}
     r = requests.post(_url("/preview"), json=payload, headers=_headers(token), timeout=DEFAULT_TIMEOUT)
     r.raise_for_status()
     return r.json()
 
+def get_dataset_status(dataset_id: str, token: Optional[str] = None) -> Dict[str, Any]:
+    r = requests.get(_url(f"/datasets/{dataset_id}/status"), headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()  # {dataset_id, state, progress, rows_done, rows, error}
+
+def get_dataset_schema(dataset_id: str, token: Optional[str] = None) -> Dict[str, Any]:
+    r = requests.get(_url(f"/datasets/{dataset_id}/schema"), headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()  # {dataset_id, columns, dtypes, row_count, source}
+
+def get_dataset_rows(dataset_id: str, offset: int = 0, limit: int = 100, token: Optional[str] = None,
+                     columns: Optional[List[str]] = None, sort_by: Optional[str] = None, descending: bool = False,
+                     filters: Optional[List[List[Any]]] = None) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"offset": int(offset), "limit": int(limit), "descending": bool(descending)}
+    if columns:
+        payload["columns"] = columns
+    if sort_by:
+        payload["sort_by"] = sort_by
+    if filters:
+        payload["filters"] = filters
+    r = requests.post(_url(f"/datasets/{dataset_id}/rows"), json=payload, headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()  # {columns, rows, offset, limit, total_rows}
+
+def get_dataset_profile(dataset_id: str, token: Optional[str] = None) -> Dict[str, Any]:
+    r = requests.get(_url(f"/datasets/{dataset_id}/profile"), headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()  # {state: "ready"|"pending", rows, columns: [{name, nulls, distinct_approx, ...}]}
+
 # ------------------------
 # Projects / Analyses / Tasks
 # ------------------------
@@ -108,6 +188,7 @@ def create_task(
     features: Optional[List[str]] = None,
     split: Optional[Dict[str, Any]] = None,
     sampling: Optional[Dict[str, Any]] = None,
+    filters: Optional[List[List[Any]]] = None,
 ) -> Dict[str, Any]:
     payload = {
         "analysis_id": analysis_id,
@@ -121,6 +202,8 @@ def create_task(
         payload["features"] = features
     if sampling:
         payload["sampling"] = sampling
+    if filters:
+        payload["filters"] = filters
     r = requests.post(_url("/tasks"), json=payload, headers=_headers(token), timeout=DEFAULT_TIMEOUT)
     r.raise_for_status()
     return r.json()
@@ -139,11 +222,32 @@ def train_task(task_id: str, token: Optional[str] = None,
     r.raise_for_status()
     return r.json()
 
+def train_tasks(task_ids: List[str], token: Optional[str] = None,
+                extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """일괄 큐잉 → {"runs": {task_id: run_id}, "errors": {task_id: 메시지}}"""
+    payload: Dict[str, Any] = {"task_ids": list(task_ids)}
+    if extra:
+        payload.update(extra)
+    r = requests.post(_url("/tasks/train"), json=payload, headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json()
+
 def get_run(run_id: str, token: Optional[str] = None) -> Dict[str, Any]:
     r = requests.get(_url(f"/runs/{run_id}"), headers=_headers(token), timeout=DEFAULT_TIMEOUT)
     r.raise_for_status()
     return r.json()
 
+def get_runs(run_ids: List[str], fields: Optional[List[str]] = None, token: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """run_id → 상태 dict (없는 run 은 빠짐). 한 번의 요청으로 여러 run 조회"""
+    if not run_ids:
+        return {}
+    params = {"ids": ",".join(run_ids)}
+    if fields:
+        params["fields"] = ",".join(fields)
+    r = requests.get(_url("/runs"), params=params, headers=_headers(token), timeout=DEFAULT_TIMEOUT)
+    r.raise_for_status()
+    return r.json().get("runs") or {}
+
 def cancel_run(run_id: str, token: Optional[str] = None) -> Dict[str, Any]:
     r = requests.post(_url(f"/runs/{run_id}/cancel"), headers=_headers(token), timeout=DEFAULT_TIMEOUT)
     if r.status_code == 404:
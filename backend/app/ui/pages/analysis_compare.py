@@ -85,10 +85,14 @@ def _render_table(run_ids, auth):
     run_ids = run_ids or []
     if not run_ids:
         return dbc.Alert("Add run IDs to compare.", color="secondary")
+    try:
+        runs = api.get_runs(run_ids, fields=["status", "task_ref"], token=token)
+    except Exception:
+        runs = {}
     rows = []
     for rid in run_ids:
         try:
-            info = api.get_run(rid, token=token)
+            info = runs[rid]
             task = info.get("task_ref") or {}
             rows.append(html.Tr([
                 html.Td(rid),
@@ -5,13 +5,14 @@
 # - 생성 후 Train 페이지로 이동할 링크 제공(메타 포함)
 
 from __future__ import annotations
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+import re
 import json
 import ast
 import urllib.parse as up
 
 import dash
-from dash import html, dcc, callback, Input, Output, State, no_update, ALL
+from dash import html, dcc, dash_table, callback, clientside_callback, Input, Output, State, no_update, ALL
 import dash_bootstrap_components as dbc
 
 from app.ui.clients import api_client as api
@@ -38,6 +39,8 @@ MODEL_PRESETS = {
     "mlp:regression": {"hidden_layer_sizes": "(128, 64)", "activation": "relu", "max_iter": 300},
 }
 
+PREVIEW_PAGE_SIZE = 200
+
 MODEL_OPTIONS = [
     {"label": "XGBoost", "value": "xgboost"},
     {"label": "LightGBM", "value": "lightgbm"},
@@ -91,9 +94,15 @@ layout = dbc.Container([
 
     dcc.Store(id="design-project-id"),
     dcc.Store(id="design-dataset-uri"),
+    dcc.Store(id="design-dataset-id"),
     dcc.Store(id="design-original-name"),
     dcc.Store(id="design-columns"),
     dcc.Store(id="design-features-selected"),
+    dcc.Store(id="design-upload-result"),
+    dcc.Store(id="design-upload-progress"),
+    dcc.Store(id="design-upload-js"),
+    # 업로드 후 백그라운드 변환(CSV/XLSX → Parquet) 진행률 폴링
+    dcc.Interval(id="design-ingest-poll", interval=1500, disabled=True),
 
     html.H2("Analysis - Design"),
 
@@ -102,13 +111,15 @@ layout = dbc.Container([
         dbc.CardHeader("1) Upload dataset"),
         dbc.CardBody([
             dbc.Row([
-                dbc.Col(dcc.Upload(
+                # 파일 선택/드롭은 브라우저 JS 가 가로채서 업로드 세션(/uploads)으로 청크 전송
+                # (dcc.Upload 의 base64 contents 는 생성되지 않음)
+                dbc.Col(html.Div(dcc.Upload(
                     id="design-upload",
                     children=html.Div(["Drag and Drop or ", html.A("Select Files")]),
                     multiple=False,
                     style={"width": "100%", "height": "80px", "lineHeight": "80px", "borderWidth": "1px",
                            "borderStyle": "dashed", "borderRadius": "6px", "textAlign": "center"}
-                ), md=7),
+                ), id="design-upload-zone", **{"data-api-base": api.API_BASE}), md=7),
                 dbc.Col(dbc.Button("Preview (modal)", id="design-btn-preview", color="secondary", outline=True), width="auto"),
                 dbc.Col(html.Div(id="design-upload-status", children=dbc.Badge("yet", color="warning")), width="auto"),
                 dbc.Col(html.Small("Allowed: .csv, .xlsx, .parquet"), width="auto")
@@ -179,7 +190,21 @@ layout = dbc.Container([
     # Preview Modal
     dbc.Modal([
         dbc.ModalHeader(dbc.ModalTitle("Dataset Preview")),
-        dbc.ModalBody(html.Div(id="design-preview-table", style={"overflowX": "auto", "overflowY": "auto", "maxHeight": "70vh"})),
+        dbc.ModalBody([
+            html.Div(id="design-preview-table"),
+            # 서버 페이지 조회(/datasets/{id}/rows) + 가상 스크롤: 현재 페이지 행만 전송/렌더
+            dash_table.DataTable(
+                id="design-preview-grid",
+                columns=[], data=[],
+                page_action="custom", page_current=0, page_size=PREVIEW_PAGE_SIZE, page_count=1,
+                sort_action="custom", sort_mode="single", sort_by=[],
+                filter_action="custom", filter_query="",
+                virtualization=True, fixed_rows={"headers": True},
+                style_table={"overflowX": "auto", "maxHeight": "65vh"},
+                style_cell={"whiteSpace": "nowrap", "minWidth": "90px"},
+            ),
+            html.Small(id="design-preview-info", className="text-muted"),
+        ]),
         dbc.ModalFooter(dbc.Button("Close", id="preview-close", className="ms-auto", n_clicks=0)),
     ], id="preview-modal", is_open=False, size="xl", scrollable=False, centered=True),
 
@@ -244,26 +269,141 @@ def _init_ctx(href):
 
 
 # ─────────────────────────────
-# 업로드
+# 업로드 (브라우저 → /uploads 세션, 청크 단위 + 재개)
+# - 같은 파일(name/size/lastModified)을 다시 올리면 localStorage 의 upload_id 로
+#   서버에 없는 청크만 재전송
+# - 진행률/결과는 set_props 로 design-upload-progress / design-upload-result 에 기록
 # ─────────────────────────────
+clientside_callback(
+    """
+    function(href) {
+        if (window.__vmlChunkedUpload) { return window.dash_clientside.no_update; }
+        window.__vmlChunkedUpload = true;
+        const setProps = window.dash_clientside.set_props;
+
+        async function send(url, opts, retries) {
+            for (let attempt = 0; ; attempt++) {
+                try {
+                    const r = await fetch(url, opts);
+                    if (r.ok) { return r; }
+                    if (r.status < 500 || attempt >= retries) { throw new Error(url + " -> " + r.status); }
+                } catch (e) {
+                    if (attempt >= retries) { throw e; }
+                }
+                await new Promise(res => setTimeout(res, 1000 * Math.pow(2, attempt)));
+            }
+        }
+
+        async function uploadFile(zone, file) {
+            const base = zone.dataset.apiBase || "/api";
+            const auth = JSON.parse(sessionStorage.getItem("gs-auth") || "null") || {};
+            const headers = auth.access_token ? {"Authorization": "Bearer " + auth.access_token} : {};
+            const key = "vml-upload:" + file.name + ":" + file.size + ":" + file.lastModified;
+
+            let sess = JSON.parse(localStorage.getItem(key) || "null");
+            let received = [];
+            if (sess) {
+                const r = await fetch(base + "/uploads/" + sess.upload_id, {headers: headers});
+                if (r.ok) { received = (await r.json()).received || []; } else { sess = null; }
+            }
+            if (!sess) {
+                const r = await send(base + "/uploads", {
+                    method: "POST",
+                    headers: Object.assign({"Content-Type": "application/json"}, headers),
+                    body: JSON.stringify({filename: file.name, size: file.size}),
+                }, 3);
+                sess = await r.json();
+                localStorage.setItem(key, JSON.stringify(sess));
+            }
+
+            const done = new Set(received);
+            for (let i = 0; i < sess.total_chunks; i++) {
+                if (!done.has(i)) {
+                    const blob = file.slice(i * sess.chunk_size, Math.min(file.size, (i + 1) * sess.chunk_size));
+                    await send(base + "/uploads/" + sess.upload_id + "/chunks/" + i,
+                               {method: "PUT", headers: headers, body: blob}, 4);
+                    done.add(i);
+                }
+                setProps("design-upload-progress", {data: {name: file.name, done: done.size, total: sess.total_chunks}});
+            }
+            const r = await send(base + "/uploads/" + sess.upload_id + "/complete", {method: "POST", headers: headers}, 3);
+            const info = await r.json();
+            localStorage.removeItem(key);
+            setProps("design-upload-result", {data: info});
+        }
+
+        const handler = function(e) {
+            const zone = e.target && e.target.closest ? e.target.closest("#design-upload-zone") : null;
+            if (!zone) { return; }
+            const files = e.type === "drop" ? (e.dataTransfer && e.dataTransfer.files) : e.target.files;
+            if (!files || !files.length) { return; }
+            e.preventDefault();
+            e.stopPropagation();
+            const file = files[0];
+            if (e.type === "change") { e.target.value = ""; }
+            setProps("design-upload-progress", {data: {name: file.name, done: 0, total: 0}});
+            uploadFile(zone, file).catch(function(err) {
+                setProps("design-upload-result", {data: {error: String(err)}});
+            });
+        };
+        document.addEventListener("change", handler, true);
+        document.addEventListener("drop", handler, true);
+        return window.dash_clientside.no_update;
+    }
+    """,
+    Output("design-upload-js", "data"),
+    Input("design-url", "href"),
+)
+
+
+_INGEST_ACTIVE = ("pending", "running")
+
+
+def _ingest_badge(st: Dict[str, Any]):
+    state = st.get("state")
+    if state in _INGEST_ACTIVE:
+        frac = st.get("progress")
+        label = f"converting {int(100 * frac)}%" if frac is not None else f"converting ({int(st.get('rows_done') or 0):,} rows)"
+        return dbc.Badge(label, color="info")
+    if state == "failed":
+        # 변환 실패여도 원본으로 계속 사용 가능
+        return dbc.Badge("ready (convert failed)", color="warning")
+    return dbc.Badge("ready", color="primary")
+
+
 @callback(
     Output("design-dataset-uri", "data"),
+    Output("design-dataset-id", "data"),
     Output("design-original-name", "data"),
     Output("design-upload-status", "children"),
-    Input("design-upload", "contents"),
-    State("design-upload", "filename"),
+    Output("design-ingest-poll", "disabled"),
+    Input("design-upload-result", "data"),
+    Input("design-upload-progress", "data"),
+    Input("design-ingest-poll", "n_intervals"),
+    State("design-dataset-id", "data"),
     State("gs-auth", "data"),
     prevent_initial_call=True
 )
-def _on_upload(contents, filename, auth):
-    token = (auth or {}).get("access_token")
-    if not contents:
-        return no_update, no_update, dbc.Badge("yet", color="warning")
-    try:
-        info = api.upload_file_from_contents(contents, filename or "uploaded.dat", token=token)
-        return info["dataset_uri"], info.get("original_name") or filename, dbc.Badge("ready", color="primary")
-    except Exception as e:
-        return no_update, no_update, dbc.Badge("fail", color="danger")
+def _on_upload(result, progress, _n, dataset_id, auth):
+    trig = dash.ctx.triggered_id
+    if trig == "design-upload-progress":
+        p = progress or {}
+        total = int(p.get("total") or 0)
+        pct = int(100 * int(p.get("done") or 0) / total) if total else 0
+        return no_update, no_update, no_update, dbc.Badge(f"uploading {pct}%", color="info"), True
+    if trig == "design-ingest-poll":
+        if not dataset_id:
+            return no_update, no_update, no_update, no_update, True
+        try:
+            st = api.get_dataset_status(dataset_id, token=(auth or {}).get("access_token"))
+        except Exception:
+            return no_update, no_update, no_update, no_update, no_update
+        return no_update, no_update, no_update, _ingest_badge(st), st.get("state") not in _INGEST_ACTIVE
+    if not result or result.get("error") or not result.get("dataset_uri"):
+        return no_update, no_update, no_update, dbc.Badge("fail", color="danger"), True
+    st = {"state": result.get("ingest_state"), "progress": 0.0}
+    return (result["dataset_uri"], result.get("dataset_id"), result.get("original_name"),
+            _ingest_badge(st), st["state"] not in _INGEST_ACTIVE)
 
 
 # ─────────────────────────────
@@ -276,25 +416,98 @@ def _on_upload(contents, filename, auth):
     Input("preview-close", "n_clicks"),
     State("preview-modal", "is_open"),
     State("design-dataset-uri", "data"),
-    State("gs-auth", "data"),
     prevent_initial_call=True
 )
-def _toggle_preview(open_clicks, close_clicks, is_open, dataset_uri, auth):
+def _toggle_preview(open_clicks, close_clicks, is_open, dataset_uri):
     trig = dash.ctx.triggered_id
     if trig == "design-btn-preview":
         if not dataset_uri:
             return False, dbc.Alert("Please upload a dataset first.", color="warning")
-        token = (auth or {}).get("access_token")
-        prev = api.preview_dataset(dataset_uri, 50, token=token)
-        header = html.Tr([html.Th(c, style={"whiteSpace": "nowrap"}) for c in prev["columns"]])
-        rows = [html.Tr([html.Td(v, style={"whiteSpace": "nowrap"}) for v in r]) for r in prev["rows"]]
-        table = dbc.Table([html.Thead(header), html.Tbody(rows)], bordered=True, hover=True)
-        return True, table
+        return True, None
     if trig == "preview-close":
         return False, no_update
     return is_open, no_update
 
 
+_FILTER_OPS = {"=": "==", "eq": "==", "s=": "==", "!=": "!=", "ne": "!=", ">": ">", "gt": ">",
+               ">=": ">=", "ge": ">=", "<": "<", "lt": "<", "<=": "<=", "le": "<=",
+               "contains": "contains", "datestartswith": "startswith"}
+_FILTER_RE = re.compile(r"^\{(.+?)\}\s+(\S+)\s+(.+)$")
+
+
+def _parse_filter_query(query: str | None) -> Tuple[List[List[Any]], List[str]]:
+    """
+    DataTable filter_query("{col} > 3 && {name} contains foo") → ([[col, op, value], ...], 적용 못 한 조건)
+    비교/contains/datestartswith 지원. 그 외(is blank 등)는 두 번째 목록으로 돌려 화면에 표시.
+    값은 숫자로 해석 가능하면 숫자(contains/datestartswith 는 항상 문자열).
+    """
+    out: List[List[Any]] = []
+    ignored: List[str] = []
+    for part in (query or "").split(" && "):
+        part = part.strip()
+        if not part:
+            continue
+        m = _FILTER_RE.match(part)
+        if not m or m.group(2) not in _FILTER_OPS:
+            ignored.append(part)
+            continue
+        op = _FILTER_OPS[m.group(2)]
+        raw = m.group(3).strip()
+        if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in ("'", '"', "`"):
+            value: Any = raw[1:-1]
+        elif op in ("contains", "startswith") or m.group(2) == "s=":
+            value = raw
+        else:
+            try:
+                value = int(raw)
+            except ValueError:
+                try:
+                    value = float(raw)
+                except ValueError:
+                    value = raw
+        out.append([m.group(1), op, value])
+    return out, ignored
+
+
+@callback(
+    Output("design-preview-grid", "columns"),
+    Output("design-preview-grid", "data"),
+    Output("design-preview-grid", "page_count"),
+    Output("design-preview-info", "children"),
+    Input("preview-modal", "is_open"),
+    Input("design-preview-grid", "page_current"),
+    Input("design-preview-grid", "page_size"),
+    Input("design-preview-grid", "sort_by"),
+    Input("design-preview-grid", "filter_query"),
+    State("design-dataset-id", "data"),
+    State("gs-auth", "data"),
+    prevent_initial_call=True
+)
+def _load_preview_page(is_open, page_current, page_size, sort_by, filter_query, dataset_id, auth):
+    if not (is_open and dataset_id):
+        return no_update, no_update, no_update, no_update
+    token = (auth or {}).get("access_token")
+    size = int(page_size or PREVIEW_PAGE_SIZE)
+    sort = (sort_by or [None])[0]
+    filters, ignored = _parse_filter_query(filter_query)
+    try:
+        res = api.get_dataset_rows(
+            dataset_id, offset=int(page_current or 0) * size, limit=size, token=token,
+            sort_by=(sort or {}).get("column_id"), descending=((sort or {}).get("direction") == "desc"),
+            filters=filters or None,
+        )
+    except Exception:
+        return no_update, [], 1, "Failed to load rows."
+    cols = [str(c) for c in res["columns"]]
+    data = [dict(zip(cols, r)) for r in res["rows"]]
+    total = res.get("total_rows")
+    page_count = max(1, -(-int(total) // size)) if total is not None else int(page_current or 0) + 2
+    info = f"{total:,} rows" if total is not None else "row count pending (ingest in progress)"
+    if ignored:
+        info += f" · unsupported filter ignored: {', '.join(ignored)}"
+    return [{"name": c, "id": c} for c in cols], data, page_count, info
+
+
 # ─────────────────────────────
 # 컬럼 옵션 세팅
 # ─────────────────────────────
@@ -302,18 +515,29 @@ def _toggle_preview(open_clicks, close_clicks, is_open, dataset_uri, auth):
     Output("design-sel-target", "options"),
     Output("feature-checklist", "options"),
     Output("design-columns", "data"),
-    Input("design-dataset-uri", "data"),
+    Input("design-dataset-id", "data"),
     State("gs-auth", "data"),
     prevent_initial_call=True
 )
-def _fill_columns(dataset_uri, auth):
-    if not dataset_uri:
+def _fill_columns(dataset_id, auth):
+    # 스키마 엔드포인트(ingest 시 계산/캐시) 사용 → 데이터셋을 다시 읽지 않음
+    if not dataset_id:
         return [], [], None
     token = (auth or {}).get("access_token")
-    prev = api.preview_dataset(dataset_uri, 50, token=token)
-    cols = prev["columns"]
+    cols = api.get_dataset_schema(dataset_id, token=token)["columns"]
     opts = [{"label": c, "value": c} for c in cols]
-    return opts, opts, cols
+    # 프로파일이 준비돼 있으면 타깃 후보에 고유값 수/결측률 표시
+    try:
+        prof = api.get_dataset_profile(dataset_id, token=token)
+    except Exception:
+        prof = {}
+    stats = {c["name"]: c for c in (prof.get("columns") or [])} if prof.get("state") == "ready" else {}
+    target_opts = [
+        {"label": (f"{c}  ·  {stats[c]['distinct_approx']:,} uniq  ·  {stats[c]['null_ratio']:.1%} null"
+                   if c in stats else c), "value": c}
+        for c in cols
+    ]
+    return target_opts, opts, cols
 
 
 # ─────────────────────────────
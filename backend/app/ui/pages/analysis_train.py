@@ -4,16 +4,19 @@ from __future__ import annotations
 from typing import Dict, List, Any
 import json
 import urllib.parse as up
-import time
+from uuid import uuid4
 
 import dash
-from dash import html, dcc, callback, Input, Output, State, no_update
+from dash import html, dcc, callback, clientside_callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 
 from app.ui.clients import api_client as api
 
 dash.register_page(__name__, path="/analysis/train", name="Training")
 
+# 상태표에 필요한 필드만 조회 (metrics/artifacts 제외)
+STATUS_FIELDS = ["status", "progress", "message", "task_ref", "dataset_original_name"]
+
 TERMINAL = {"succeeded", "failed", "error", "canceled", "finished", "completed"}
 
 def is_terminal(status: str | None) -> bool:
@@ -22,14 +25,16 @@ def is_terminal(status: str | None) -> bool:
 def _badge(status: str | None) -> dbc.Badge:
     s = (status or "-").lower()
     color = {
-        "queued": "secondary", "pending": "secondary", "running": "primary",
+        "queued": "secondary", "pending": "secondary", "delayed": "secondary", "running": "primary",
         "cancel_requested": "warning", "canceled": "dark", "failed": "danger",
         "error": "danger", "succeeded": "success", "finished": "success", "completed": "success",
     }.get(s, "light")
     return dbc.Badge(s if s != "-" else "-", color=color, className="text-uppercase")
 
-def _render_table(task_ids: List[str], run_ids: Dict[str, str], status_map: Dict[str, Any], meta: Dict[str, Dict[str, str]] | None) -> html.Div:
+def _render_table(task_ids: List[str], run_ids: Dict[str, str], status_map: Dict[str, Any], meta: Dict[str, Dict[str, str]] | None,
+                  errors: Dict[str, str] | None = None) -> html.Div:
     meta = meta or {}
+    errors = errors or {}
     header = html.Thead(html.Tr([html.Th("Task ID"), html.Th("Model"), html.Th("Type"), html.Th("File"), html.Th("Run ID"),
                                  html.Th("Status"), html.Th("Progress"), html.Th("Message"), html.Th("Results")]))
     rows = []
@@ -37,6 +42,9 @@ def _render_table(task_ids: List[str], run_ids: Dict[str, str], status_map: Dict
         rid = (run_ids or {}).get(tid)
         info = (status_map or {}).get(rid or "", {}) if rid else {}
         st, prog, msg = info.get("status"), info.get("progress"), info.get("message")
+        if not rid and tid in errors:
+            # 큐잉 거부(한도 초과/태스크 없음 등)
+            st, msg = "error", errors[tid]
         m = (meta or {}).get(tid, {})
         model = m.get("model_family") or (info.get("task_ref") or {}).get("model_family") or "-"
         ttype = m.get("task_type") or (info.get("task_ref") or {}).get("task_type") or "-"
@@ -53,9 +61,13 @@ layout = dbc.Container([
     dcc.Location(id="train-url"),
     dcc.Store(id="train-task-ids"),
     dcc.Store(id="train-task-meta"),
+    dcc.Store(id="train-session"),
     dcc.Store(id="train-run-ids"),
+    dcc.Store(id="train-errors"),
     dcc.Store(id="train-status"),
     dcc.Store(id="train-busy"),
+    dcc.Store(id="train-stream"),
+    dcc.Store(id="train-api-base", data=api.API_BASE),
     dcc.Interval(id="train-poll", interval=2000, disabled=True),
     dbc.Row([
         dbc.Col(dbc.Button("Train All", id="btn-start-all", color="primary"), width="auto"),
@@ -65,10 +77,11 @@ layout = dbc.Container([
     html.Div(id="train-contents"),
 ], fluid=True)
 
-# 1) URL → task_ids (+ meta)
+# 1) URL → task_ids (+ meta), 페이지 로드마다 새 session id (큐잉 idempotency key 용)
 @callback(
     Output("train-task-ids", "data"),
     Output("train-task-meta", "data"),
+    Output("train-session", "data"),
     Input("train-url", "href"),
     prevent_initial_call=False
 )
@@ -85,20 +98,23 @@ def _init_from_url(href):
         if "meta" in params and params["meta"]:
             try: meta = json.loads(up.unquote_plus(params["meta"]))
             except Exception: meta = {}
-    return task_ids, meta or {}
+    return task_ids, meta or {}, uuid4().hex
 
-# 2) Train/Cancel → run_ids만 갱신 (유일 작성)
+# 2) Train/Cancel → run_ids(+ 큐잉 실패 태스크별 메시지) 갱신 (유일 작성)
 @callback(
     Output("train-run-ids", "data"),
+    Output("train-errors", "data"),
     Input("btn-start-all", "n_clicks"),
     Input("btn-cancel-all", "n_clicks"),
     State("train-task-ids", "data"),
     State("train-run-ids", "data"),
     State("train-status", "data"),
+    State("train-session", "data"),
     State("gs-auth", "data"),
-    prevent_initial_call=True
+    prevent_initial_call=True,
+    running=[(Output("btn-start-all", "disabled"), True, False)],  # 요청 중 재클릭 방지
 )
-def _control_runs(n_start, n_cancel, task_ids, run_ids, status_map, auth):
+def _control_runs(n_start, n_cancel, task_ids, run_ids, status_map, session, auth):
     token = (auth or {}).get("access_token")
     trig = dash.ctx.triggered_id
     task_ids = task_ids or []
@@ -106,17 +122,14 @@ def _control_runs(n_start, n_cancel, task_ids, run_ids, status_map, auth):
     status_map = status_map or {}
 
     if trig == "btn-start-all":
-        run_ids = {}
-        now_tag = str(int(time.time()))
-        for tid in task_ids:
-            try:
-                resp = api.train_task(tid, extra={"idempotency_key": f"start:{tid}:{now_tag}", "force": True}, token=token)
-                new_rid = resp.get("run_id")
-                if new_rid:
-                    run_ids[tid] = new_rid
-            except Exception:
-                pass
-        return run_ids
+        try:
+            # 태스크별 key = "start:<session>:<n_clicks>:<task_id>" (서버에서 부여) → 같은 클릭의 재전송은 같은 run
+            # force 없음 → 이미 활성 run 이 있는 태스크는 그 run_id (클릭을 반복해도 중복 학습 없음)
+            key = f"start:{session or 'nosession'}:{n_start}"
+            resp = api.train_tasks(task_ids, extra={"idempotency_key": key}, token=token)
+        except Exception as e:
+            return {}, {tid: f"enqueue failed: {e}" for tid in task_ids}
+        return dict(resp.get("runs") or {}), dict(resp.get("errors") or {})
 
     if trig == "btn-cancel-all":
         for rid in (run_ids or {}).values():
@@ -124,11 +137,54 @@ def _control_runs(n_start, n_cancel, task_ids, run_ids, status_map, auth):
                 api.cancel_run(rid, token=token)
             except Exception:
                 pass
-        return run_ids
-
-    return no_update
+        return run_ids, no_update
+
+    return no_update, no_update
+
+# 3a) push: 브라우저 EventSource(/runs/stream) → train-status (set_props)
+#     연결돼 있는 동안 train-poll 은 꺼짐, 끊기면(EventSource 재연결 대기) 폴링으로 대체
+clientside_callback(
+    """
+    function(runIds, base) {
+        const ns = window.__vmlRunStream = window.__vmlRunStream || {};
+        if (ns.es) { ns.es.close(); ns.es = null; }
+        const ids = Object.values(runIds || {});
+        if (!ids.length || typeof EventSource === "undefined") { return {connected: false}; }
+        const setProps = window.dash_clientside.set_props;
+        const runs = {};
+        const es = new EventSource((base || "/api") + "/runs/stream?ids=" + encodeURIComponent(ids.join(",")));
+        ns.es = es;
+
+        function push() {
+            if (!document.getElementById("train-contents")) { es.close(); ns.es = null; return; }
+            setProps("train-status", {data: Object.assign({}, runs)});
+        }
+        es.addEventListener("snapshot", function(e) {
+            const d = JSON.parse(e.data);
+            Object.keys(d.runs).forEach(function(rid) { runs[rid] = d.runs[rid]; });
+            setProps("train-stream", {data: {connected: true, mode: d.mode}});
+            push();
+        });
+        es.addEventListener("status", function(e) {
+            const d = JSON.parse(e.data);
+            Object.keys(d).forEach(function(rid) { runs[rid] = Object.assign(runs[rid] || {}, d[rid]); });
+            push();
+        });
+        es.addEventListener("end", function() {
+            es.close();
+            ns.es = null;
+            setProps("train-stream", {data: {connected: false, ended: true}});
+        });
+        es.onerror = function() { setProps("train-stream", {data: {connected: false}}); };
+        return {connected: false};
+    }
+    """,
+    Output("train-stream", "data"),
+    Input("train-run-ids", "data"),
+    State("train-api-base", "data"),
+)
 
-# 3) 폴링 → 상태맵
+# 3b) 폴링 → 상태맵 (stream 미연결 시 fallback)
 @callback(
     Output("train-status", "data"),
     Input("train-poll", "n_intervals"),
@@ -142,12 +198,12 @@ def _poll_status(_n, run_ids, auth):
     out: Dict[str, Any] = {}
     if not run_ids:
         return out
+    try:
+        runs = api.get_runs(list(run_ids.values()), fields=STATUS_FIELDS, token=token)
+    except Exception:
+        return {rid: {"status": "error", "message": "fetch failed"} for rid in run_ids.values()}
     for rid in run_ids.values():
-        try:
-            info = api.get_run(rid, token=token)
-            out[rid] = info or {}
-        except Exception:
-            out[rid] = {"status": "error", "message": "fetch failed"}
+        out[rid] = runs.get(rid) or {"status": "error", "message": "run not found"}
     return out
 
 # 4) 폴링 on/off & busy
@@ -156,14 +212,16 @@ def _poll_status(_n, run_ids, auth):
     Output("train-busy", "data"),
     Input("train-run-ids", "data"),
     Input("train-status", "data"),
+    Input("train-stream", "data"),
 )
-def _derive_poll_and_busy(run_ids, status_map):
+def _derive_poll_and_busy(run_ids, status_map, stream):
     run_ids = run_ids or {}
     status_map = status_map or {}
     if not run_ids:
         return True, False
     any_active = any(not is_terminal((status_map.get(r) or {}).get("status")) for r in run_ids.values())
-    return (not any_active), any_active
+    streaming = bool((stream or {}).get("connected"))
+    return (not any_active or streaming), any_active
 
 # 5) 렌더
 @callback(
@@ -173,8 +231,9 @@ def _derive_poll_and_busy(run_ids, status_map):
     Input("train-run-ids", "data"),
     Input("train-status", "data"),
     Input("train-task-meta", "data"),
+    Input("train-errors", "data"),
 )
-def _render(task_ids, run_ids, status_map, meta):
+def _render(task_ids, run_ids, status_map, meta, errors):
     task_ids = task_ids or []
     run_ids = run_ids or {}
     status_map = status_map or {}
@@ -182,5 +241,9 @@ def _render(task_ids, run_ids, status_map, meta):
     any_active = any(not is_terminal((status_map.get(r) or {}).get("status")) for r in run_ids.values())
     banner = (dbc.Alert("Running... polling statuses", color="info", className="py-2")
               if any_active else dbc.Alert("Idle. Click Train All to enqueue runs.", color="secondary", className="py-2"))
-    table = _render_table(task_ids, run_ids, status_map, meta)
+    errors = {t: m for t, m in (errors or {}).items() if t not in run_ids}
+    if errors:
+        banner = html.Div([banner, dbc.Alert(f"{len(errors)} task(s) were not enqueued — see Message column.",
+                                             color="warning", className="py-2")])
+    table = _render_table(task_ids, run_ids, status_map, meta, errors)
     return banner, table
\ No newline at end of file
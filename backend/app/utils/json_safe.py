@@ -6,14 +6,23 @@ JSON 직렬화 안전 헬퍼 (원본 요구사항 재반영)
 - numpy/pandas/native 혼합 타입을 재귀적으로 처리
 - datetime -> ISO8601
 - DataFrame 미리보기 편의 함수 제공
+- DataFrame → rows 는 컬럼 단위 벡터 변환(df_to_rows), 셀 단위 재귀 호출 없음
+- FastJSONResponse: orjson 이 있으면 사용(없으면 표준 json)
 """
 from __future__ import annotations
 from typing import Any, List, Dict
+import json
 import math
 import numpy as np
 import pandas as pd
 from datetime import datetime, date
 from decimal import Decimal
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 미설치 환경
+    orjson = None
 
 Finite = (int, float, np.integer, np.floating)
 
@@ -60,16 +69,72 @@ def json_safe(obj: Any) -> Any:
     if isinstance(obj, pd.DataFrame):
         return {
             "columns": [str(c) for c in obj.columns],
-            "rows": [[json_safe(v) for v in row] for row in obj.itertuples(index=False, name=None)]
+            "rows": df_to_rows(obj),
         }
     try:
         return str(obj)
     except Exception:
         return None
 
+def _column_values(s: pd.Series) -> List[Any]:
+    """
+    Series → JSON 안전 파이썬 값 리스트 (dtype 별 벡터 변환)
+    - float: NaN/±Inf → None
+    - int/bool(numpy, nullable): 파이썬 스칼라, pd.NA → None
+    - datetime: ISO8601 문자열 (tz-aware 는 UTC 'Z'), NaT → None
+    - categorical: 카테고리 값만 변환 후 codes 로 펼침
+    - object: 문자열은 그대로, 그 외 값만 json_safe
+    """
+    dt = s.dtype
+    if isinstance(dt, pd.CategoricalDtype):
+        # 카테고리(고유값)만 변환 후 codes 로 펼침; code -1(결측) → 마지막 None
+        cats = np.array(_column_values(pd.Series(dt.categories)) + [None], dtype=object)
+        return cats[s.cat.codes.to_numpy()].tolist()
+    if pd.api.types.is_float_dtype(dt):
+        arr = s.to_numpy(dtype="float64", na_value=np.nan)
+        out = arr.astype(object)
+        out[~np.isfinite(arr)] = None
+        return out.tolist()
+    if pd.api.types.is_integer_dtype(dt) or pd.api.types.is_bool_dtype(dt):
+        # numpy int/bool 및 nullable Int64/boolean (pd.NA → None)
+        return s.to_numpy(dtype=object, na_value=None).tolist()
+    if pd.api.types.is_datetime64_any_dtype(dt):
+        mask = s.isna().to_numpy()
+        tz = getattr(dt, "tz", None)
+        naive = (s.dt.tz_convert("UTC").dt.tz_localize(None) if tz is not None else s).to_numpy().astype("datetime64[ns]")
+        # 컬럼 전체에 같은 정밀도: 초 미만 값이 없으면 초 단위, 있으면 마이크로초
+        frac = naive.view("i8")[~mask] % 1_000_000_000
+        unit = "s" if not frac.any() else "us"
+        arr = np.datetime_as_string(naive, unit=unit, timezone=("UTC" if tz is not None else "naive"))
+        out = arr.astype(object)
+        out[mask] = None
+        return out.tolist()
+    if pd.api.types.is_timedelta64_dtype(dt):
+        mask = s.isna().to_numpy()
+        out = s.astype(str).to_numpy(dtype=object, copy=True)
+        out[mask] = None
+        return out.tolist()
+    mask = s.isna().to_numpy()
+    out = s.to_numpy(dtype=object, copy=True)
+    if mask.any():
+        out[mask] = None
+    return [v if (v is None or type(v) is str) else json_safe(v) for v in out.tolist()]
+
+def df_to_rows(df: pd.DataFrame) -> List[List[Any]]:
+    cols = [_column_values(df.iloc[:, i]) for i in range(df.shape[1])]
+    if not cols:
+        return [[] for _ in range(len(df))]
+    return [list(r) for r in zip(*cols)]
+
 def df_preview_safe(df: pd.DataFrame, limit: int = 50) -> Dict[str, Any]:
-    head = df.head(int(limit)).copy()
-    rows: List[List[Any]] = []
-    for row in head.itertuples(index=False, name=None):
-        rows.append([json_safe(v) for v in row])
-    return {"columns": [str(c) for c in head.columns.tolist()], "rows": rows}
\ No newline at end of file
+    head = df.head(int(limit))
+    return {"columns": [str(c) for c in head.columns.tolist()], "rows": df_to_rows(head)}
+
+class FastJSONResponse(JSONResponse):
+    """
+    큰 rows 응답용. jsonable_encoder 를 거치지 않으므로 값은 미리 JSON 안전해야 함(df_to_rows 등).
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,213 @@
+# backend/app/worker.py
+
+"""
+학습 워커: python -m app.worker [--concurrency N] [--worker-id ID]
+- Mongo jobs 에서 queued 잡을 원자적으로 클레임(claim_job) → 프로세스 풀에서 trainer.run_training 실행
+- heartbeat 스레드가 실행 중 잡의 lease 를 주기적으로 연장, 소유권을 잃은 잡은 결과를 버림
+- 종료 전이는 finish_job(소유 워커만 반영) → 여러 노드의 워커가 같은 큐를 비워도 중복 실행 없음
+- 스위퍼 스레드: lease 만료 running 잡(죽은 워커)을 backoff 후 재큐잉, 재시도 한도 초과 시 failed
+  + RECONCILE_INTERVAL_SECONDS 마다 활성 잡 카운터 재조정
+- 진행률: 자식 프로세스 → multiprocessing 큐 → 부모의 ProgressReporter 하나가 병합해
+  PROGRESS_FLUSH_MS 마다 모든 실행 중 잡을 bulk_write 1회로 기록, 종료 전이는 즉시(finish)
+- 자식 프로세스 비정상 종료(BrokenProcessPool): 풀을 새로 만들고, 결과를 못 받은 잡은 바로 재큐잉(requeue_job)
+- SIGINT/SIGTERM: 새 클레임 중단, 실행 중 잡 완료까지 대기
+"""
+from __future__ import annotations
+from typing import Dict, Optional
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from uuid import uuid4
+
+from app.config import settings
+from app.queue_mongo import (
+    claim_job, ensure_indexes, heartbeat_job, reconcile_counters, requeue_expired_jobs, requeue_job,
+)
+from app.services.progress import ProgressReporter
+from app.services.trainer import JobCanceled, run_training, set_progress_sink
+
+log = logging.getLogger("vml.worker")
+
+
+def _init_child(progress_q) -> None:
+    # Ctrl+C 는 부모만 처리(정상 종료 대기), 자식은 실행 중 잡을 계속 진행
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    set_progress_sink(progress_q)
+
+
+class Worker:
+    def __init__(self, worker_id: Optional[str] = None, concurrency: Optional[int] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self.concurrency = max(1, int(concurrency or settings.WORKER_CONCURRENCY))
+        self.lease_seconds = int(settings.WORKER_LEASE_SECONDS)
+        self._stop = threading.Event()
+        self._hb_stop = threading.Event()  # 실행 중 잡이 모두 끝난 뒤에 멈춤
+        self._running: Dict[Future, str] = {}
+        self._lock = threading.Lock()
+        # spawn: 자식 프로세스가 부모의 MongoClient(스레드/소켓)를 fork 로 물려받지 않도록
+        self._ctx = multiprocessing.get_context("spawn")
+        self._progress_q = self._ctx.Queue()
+        self._reporter = ProgressReporter()
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.concurrency, mp_context=self._ctx,
+            initializer=_init_child, initargs=(self._progress_q,),
+        )
+
+    def _reset_pool(self) -> None:
+        # 자식 프로세스가 비정상 종료(OOM kill 등)하면 풀 전체가 BrokenProcessPool → 새 풀로 교체
+        # (같은 풀의 나머지 잡도 모두 BrokenProcessPool 로 끝나므로 이미 교체했으면 건너뜀)
+        if not getattr(self._pool, "_broken", False):
+            return
+        log.warning("process pool broken; starting a new one")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+
+    def _requeue(self, job_id: str, reason: str) -> None:
+        # 결과를 못 받은 잡: lease 만료를 기다리지 않고 스위퍼와 같은 규칙으로 되돌림
+        self._reporter.drop(job_id)
+        try:
+            kind = requeue_job(job_id, self.worker_id, settings.JOB_MAX_ATTEMPTS,
+                               settings.JOB_RETRY_BACKOFF_SECONDS, reason)
+        except Exception:
+            log.exception("requeue failed for job %s (sweeper will recover it)", job_id)
+            return
+        log.warning("job %s %s after %s", job_id, kind or "was reassigned", reason)
+
+    def stop(self, *_args) -> None:
+        self._stop.set()
+
+    # -------------------------------------------------------------------
+    def _heartbeat_loop(self) -> None:
+        interval = float(settings.WORKER_HEARTBEAT_SECONDS)
+        while not self._hb_stop.wait(interval):
+            with self._lock:
+                job_ids = list(self._running.values())
+            for job_id in job_ids:
+                try:
+                    if heartbeat_job(job_id, self.worker_id, self.lease_seconds) is None:
+                        log.warning("lost lease on job %s", job_id)
+                except Exception:
+                    log.exception("heartbeat failed for job %s", job_id)
+
+    def _progress_loop(self) -> None:
+        # 자식이 보낸 (job_id, fields) → reporter (기록은 reporter 의 flush 주기에 맞춰 병합)
+        while not self._hb_stop.is_set():
+            try:
+                job_id, fields = self._progress_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._reporter.report(job_id, **fields)
+
+    def _sweep_loop(self) -> None:
+        interval = float(settings.SWEEP_INTERVAL_SECONDS)
+        last_reconcile = time.monotonic()
+        while not self._stop.wait(interval):
+            try:
+                counts = requeue_expired_jobs(settings.JOB_MAX_ATTEMPTS, settings.JOB_RETRY_BACKOFF_SECONDS)
+                if any(counts.values()):
+                    log.info("sweeper recovered expired jobs: %s", counts)
+                if time.monotonic() - last_reconcile >= float(settings.RECONCILE_INTERVAL_SECONDS):
+                    last_reconcile = time.monotonic()
+                    log.info("reconciled counters: %s", reconcile_counters())
+            except Exception:
+                log.exception("sweeper failed")
+
+    def _on_done(self, fut: Future, job_id: str) -> None:
+        try:
+            fields = fut.result()
+            status = "succeeded"
+        except BrokenProcessPool:
+            self._requeue(job_id, "worker process crash")
+            self._reset_pool()
+            return
+        except JobCanceled:
+            fields, status = {"message": "canceled"}, "canceled"
+        except Exception as e:
+            fields, status = {"message": f"{type(e).__name__}: {e}"}, "failed"
+        if not self._reporter.finish(job_id, self.worker_id, status, fields):
+            log.warning("job %s was reassigned; dropped %s result", job_id, status)
+        else:
+            log.info("job %s %s", job_id, status)
+
+    def run(self) -> None:
+        log.info("worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        hb = threading.Thread(target=self._heartbeat_loop, name="heartbeat", daemon=True)
+        hb.start()
+        progress = threading.Thread(target=self._progress_loop, name="progress", daemon=True)
+        progress.start()
+        threading.Thread(target=self._sweep_loop, name="sweeper", daemon=True).start()
+        poll = float(settings.WORKER_POLL_SECONDS)
+        try:
+            while not self._stop.is_set():
+                # 빈 슬롯만큼 클레임
+                claimed = False
+                while len(self._running) < self.concurrency and not self._stop.is_set():
+                    job = claim_job(self.worker_id, self.lease_seconds)
+                    if not job:
+                        break
+                    job_id = str(job["_id"])
+                    job.pop("_id", None)
+                    self._reporter.track(job_id)
+                    try:
+                        fut = self._pool.submit(run_training, job_id, job)
+                    except BrokenProcessPool:
+                        self._requeue(job_id, "worker process crash")
+                        self._reset_pool()
+                        break
+                    with self._lock:
+                        self._running[fut] = job_id
+                    claimed = True
+                    log.info("claimed job %s", job_id)
+
+                if self._running:
+                    done, _ = wait(list(self._running), timeout=(0 if claimed else poll), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        with self._lock:
+                            job_id = self._running.pop(fut)
+                        self._on_done(fut, job_id)
+                elif not claimed:
+                    self._stop.wait(poll)
+
+            # 종료: 실행 중 잡 완료까지 대기 (lease 는 heartbeat 가 계속 연장)
+            for fut in list(self._running):
+                wait([fut])
+                with self._lock:
+                    job_id = self._running.pop(fut)
+                self._on_done(fut, job_id)
+        finally:
+            self._stop.set()
+            self._hb_stop.set()
+            self._pool.shutdown(wait=True)
+            progress.join(timeout=2)
+            self._reporter.close()
+            log.info("worker %s stopped", self.worker_id)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="VML training worker")
+    ap.add_argument("--concurrency", type=int, default=None)
+    ap.add_argument("--worker-id", default=None)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    ensure_indexes()
+    reconcile_counters()
+    w = Worker(worker_id=args.worker_id, concurrency=args.concurrency)
+    signal.signal(signal.SIGINT, w.stop)
+    signal.signal(signal.SIGTERM, w.stop)
+    w.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# backend/tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(_TESTS_DIR))
+
+# Settings 는 현재 디렉터리의 .env 를 읽음 → backend/.env(예시 값, CORS_ORIGINS=* 등)를 피해서 기본값으로 로드
+_cwd = os.getcwd()
+os.chdir(_TESTS_DIR)
+try:
+    from app.config import settings  # noqa: E402
+finally:
+    os.chdir(_cwd)
+
+
+@pytest.fixture(autouse=True)
+def artifact_root(tmp_path, monkeypatch):
+    # 데이터셋/캐시/업로드 세션은 테스트마다 임시 디렉터리에
+    monkeypatch.setattr(settings, "ARTIFACT_ROOT", str(tmp_path))
+    return tmp_path
@@ -0,0 +1,80 @@
+# backend/tests/test_data_loader.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.services import data_loader as dl
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        "a": rng.integers(0, 50, n).astype(float),
+        "b": rng.normal(size=n),
+        "c": [f"s{i}" for i in range(n)],
+        "g": rng.integers(0, 3, n),
+    })
+    df.loc[::37, "a"] = np.nan
+    return df
+
+
+def _expected(df, offset, limit, descending, filters=None, columns=None):
+    tbl = pa.Table.from_pandas(df, preserve_index=False)
+    if filters:
+        tbl = tbl.filter(dl._filter_expr(filters))
+    total = tbl.num_rows
+    tbl = tbl.sort_by([("a", "descending" if descending else "ascending")]).slice(offset, limit)
+    if columns:
+        tbl = tbl.select(columns)
+    return tbl.to_pandas(), total
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("offset,limit", [(0, 10), (100, 50), (2990, 50), (4000, 5)])
+@pytest.mark.parametrize("filters", [None, [["g", "==", 1]], [["b", ">", 0.5], ["g", "in", [0, 2]]]])
+@pytest.mark.parametrize("columns", [None, ["c", "b"]])
+def test_read_window_sorted_parquet(tmp_path, frame, descending, offset, limit, filters, columns):
+    path = tmp_path / "x.parquet"
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path, row_group_size=700)
+    got, total = dl.read_window(f"file://{path}", offset, limit, columns, "a", descending, filters)
+    exp, exp_total = _expected(frame, offset, limit, descending, filters, columns)
+    assert total == exp_total
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), exp.reset_index(drop=True))
+
+
+def test_read_window_sorted_csv_without_sidecar(tmp_path, frame):
+    path = tmp_path / "x.csv"
+    frame.to_csv(path, index=False)
+    got, total = dl.read_window(f"file://{path}", 100, 20, ["c"], "a", True, [["g", "==", 1]])
+    exp, exp_total = _expected(frame, 100, 20, True, [["g", "==", 1]], ["c"])
+    assert total == exp_total
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), exp.reset_index(drop=True))
+
+
+def test_read_window_filters_without_sort(tmp_path, frame):
+    path = tmp_path / "x.parquet"
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path, row_group_size=700)
+    got, total = dl.read_window(f"file://{path}", 10, 25, None, None, False, [["g", "!=", 2], ["c", "contains", "1"]])
+    exp = frame[(frame.g != 2) & frame.c.str.contains("1")]
+    assert total == len(exp)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), exp.iloc[10:35].reset_index(drop=True))
+
+
+@pytest.mark.parametrize("filters", [
+    [["g", "=="]],
+    [["g"]],
+    ["g"],
+    [["g", "~", 1]],
+    [["g", "in", 1]],
+    [[None, "==", 1]],
+])
+def test_malformed_filters_raise_value_error(tmp_path, frame, filters):
+    path = tmp_path / "x.parquet"
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path)
+    with pytest.raises(ValueError):
+        dl.read_window(f"file://{path}", 0, 10, None, None, False, filters)
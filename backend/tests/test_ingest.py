@@ -0,0 +1,102 @@
+# backend/tests/test_ingest.py
+
+import datetime as dt
+import os
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services import ingest
+from app.services.dataset_store import SIDECAR_PARQUET, cache_dir
+
+
+def _sidecar(path):
+    return pq.read_table(os.path.join(cache_dir(path), SIDECAR_PARQUET))
+
+
+def test_xlsx_mixed_types_widen_to_string(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "_XLSX_BATCH_ROWS", 10)  # 충돌이 뒤 배치에서 나도록
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["mixed", "late", "num", "when", "sparse"])
+    for i in range(30):
+        ws.append([
+            "A3" if i == 2 else i,        # 첫 배치 안에서 섞임
+            "z" if i == 25 else i,        # 세 번째 배치에서 문자열
+            1.5 if i == 15 else i,        # 정수 → 실수
+            dt.datetime(2020, 1, 1 + i % 28),
+            7 if i == 22 else None,       # 앞 배치는 전부 빈 값
+        ])
+    path = str(tmp_path / "mixed.xlsx")
+    wb.save(path)
+
+    meta = ingest.convert_to_parquet(path)
+    assert meta["state"] == "ready", meta.get("error")
+    assert meta["rows"] == 30
+    tbl = _sidecar(path)
+    assert tbl.schema.field("mixed").type == pa.string()
+    assert tbl.schema.field("late").type == pa.string()
+    assert tbl.schema.field("num").type == pa.float64()
+    assert pa.types.is_timestamp(tbl.schema.field("when").type)
+    assert tbl.column("mixed").to_pylist()[:4] == ["0", "1", "A3", "3"]
+    assert tbl.column("late").to_pylist()[24:26] == ["24", "z"]
+    assert tbl.column("sparse").to_pylist()[21:23] == [None, 7]
+
+
+def test_frame_to_parquet_stringifies_mixed_object_columns(tmp_path):
+    df = pd.DataFrame({"a": [1, 2, "A3", 4], "b": [1.0, None, 2.0, 3.0]})
+    dst = str(tmp_path / "f.parquet")
+    assert ingest._frame_to_parquet(df, dst) == 4
+    assert pq.read_table(dst).to_pydict() == {"a": ["1", "2", "A3", "4"], "b": [1.0, None, 2.0, 3.0]}
+
+
+def test_csv_widens_only_the_failing_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest.settings, "CSV_BLOCK_SIZE", 1 << 12)  # 뒤 블록에서 타입이 깨지도록
+    n = 2000
+    df = pd.DataFrame({
+        "a": [1] * (n - 1) + [1.5],            # 정수 → float64
+        "code": [7] * (n - 1) + ["x7"],         # 정수 → float64 → string
+        "late": [None] * (n - 1) + [3.25],      # null → float64
+        "b": [0.5] * n,
+        "flag": [True, False] * (n // 2),
+        "name": [f"s{i}" for i in range(n)],
+    })
+    path = str(tmp_path / "w.csv")
+    df.to_csv(path, index=False)
+
+    meta = ingest.convert_to_parquet(path)
+    assert meta["state"] == "ready", meta.get("error")
+    schema = _sidecar(path).schema
+    assert schema.field("a").type == pa.float64()
+    assert schema.field("code").type == pa.string()
+    assert schema.field("late").type == pa.float64()
+    assert schema.field("b").type == pa.float64()
+    assert schema.field("flag").type == pa.bool_()
+    assert schema.field("name").type == pa.string()
+
+
+def test_csv_quoted_newlines(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest.settings, "CSV_BLOCK_SIZE", 1 << 12)
+    path = str(tmp_path / "nl.csv")
+    with open(path, "w") as f:
+        f.write("a,b\n" + "".join(f'{i},"x{i}"\n' for i in range(2000)) + '5,"multi\nline"\n')
+    meta = ingest.convert_to_parquet(path)
+    assert meta["state"] == "ready", meta.get("error")
+    tbl = _sidecar(path)
+    assert tbl.num_rows == 2001
+    assert tbl.column("b").to_pylist()[-1] == "multi\nline"
+
+
+def test_cache_meta_concurrent_writers(tmp_path):
+    # ingest 스레드풀처럼 같은 프로세스의 여러 스레드가 같은 meta.json 을 동시에 기록
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.dataset_store import read_cache_meta, write_cache_meta
+
+    path = str(tmp_path / "d.csv")
+    open(path, "w").close()
+    with ThreadPoolExecutor(8) as ex:
+        list(ex.map(lambda i: write_cache_meta(path, {"i": i, "pad": "x" * 10000}), range(200)))
+    assert read_cache_meta(path)["i"] in range(200)
+    assert [n for n in os.listdir(cache_dir(path)) if n.endswith(".tmp")] == []
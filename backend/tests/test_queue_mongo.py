@@ -0,0 +1,174 @@
+# backend/tests/test_queue_mongo.py
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+mongomock = pytest.importorskip("mongomock")
+
+from app import queue_mongo as q  # noqa: E402
+from app.config import settings  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def mongo(monkeypatch):
+    # 모듈 전역 컬렉션을 mongomock 으로 교체 (실제 Mongo 연결 없음)
+    db = mongomock.MongoClient()["vml_test"]
+    monkeypatch.setattr(q, "_jobs", db["jobs"])
+    monkeypatch.setattr(q, "_counters", db["jobs_counters"])
+    monkeypatch.setattr(settings, "MAX_ACTIVE_RUNS_GLOBAL", 5)
+    monkeypatch.setattr(settings, "MAX_ACTIVE_RUNS_PER_USER", 2)
+    q.ensure_indexes()
+    return db
+
+
+def _counter(key, field="active"):
+    return int((q._counters.find_one({"_id": key}) or {}).get(field) or 0)
+
+
+def _payload(task_id, user_id="u1"):
+    return {"task_ref": {"task_id": task_id}, "user_id": user_id}
+
+
+# -------------------------------------------------------------------
+# 카운터 예약 / 반환
+# -------------------------------------------------------------------
+def test_reserve_respects_limit_and_release():
+    assert q._reserve("k", "active", 2)
+    assert q._reserve("k", "active", 2)
+    assert not q._reserve("k", "active", 2)
+    assert _counter("k") == 2
+    q._release("k", "active")
+    assert _counter("k") == 1
+    assert q._reserve("k", "active", 2)
+    assert not q._reserve("k", "active", 2, n=3)  # n > limit
+
+
+def test_release_never_goes_negative():
+    q._release("k", "active", 3)
+    assert _counter("k") == 0
+    assert q._reserve("k", "active", None, n=2)
+    q._release("k", "active", 5)
+    assert _counter("k") == 2
+
+
+def test_reserve_many_takes_what_is_left():
+    assert q._reserve_many("k", "active", 3, 5) == 3
+    assert q._reserve_many("k", "active", 3, 5) == 2
+    assert q._reserve_many("k", "active", 3, 5) == 0
+    assert _counter("k") == 5
+
+
+def test_reserve_retries_after_losing_first_upsert_race(monkeypatch):
+    real = q._counters
+
+    class _Racing:
+        # 첫 upsert 직전에 다른 요청이 같은 key 를 먼저 만든 상황
+        def __init__(self):
+            self.raced = False
+
+        def find_one_and_update(self, flt, update, upsert=False, **kw):
+            if upsert and not self.raced:
+                self.raced = True
+                real.insert_one({"_id": flt["_id"], "active": 1})
+                raise DuplicateKeyError("E11000 duplicate key")
+            return real.find_one_and_update(flt, update, upsert=upsert, **kw)
+
+    monkeypatch.setattr(q, "_counters", _Racing())
+    assert q._reserve("user:new", "active", 2)
+    assert real.find_one({"_id": "user:new"})["active"] == 2
+
+
+def test_reconcile_counters_matches_jobs():
+    ids = [q.create_job(_payload(f"t{i}", "u1" if i < 2 else "u2")) for i in range(3)]
+    q._jobs.update_one({"_id": q._oid(ids[0])}, {"$set": {"status": "running"}})
+    q._jobs.update_one({"_id": q._oid(ids[2])}, {"$set": {"status": "succeeded"}})  # 카운터 반환 없이 종료
+    q._counters.update_one({"_id": "user:ghost"}, {"$set": {"active": 4, "running": 1}}, upsert=True)
+
+    res = q.reconcile_counters()
+    assert res["active"] == 2
+    assert _counter(q._GLOBAL_KEY) == 2
+    assert _counter("user:u1") == 2 and _counter("user:u1", "running") == 1
+    assert _counter("user:u2") == 0
+    assert _counter("user:ghost") == 0 and _counter("user:ghost", "running") == 0
+
+
+# -------------------------------------------------------------------
+# 한도 / 멱등 생성
+# -------------------------------------------------------------------
+def test_create_job_enforces_user_and_global_limits():
+    q.create_job(_payload("a1", "u1"))
+    q.create_job(_payload("a2", "u1"))
+    with pytest.raises(q.QuotaExceeded, match="user"):
+        q.create_job(_payload("a3", "u1"))
+    for i in range(3):
+        q.create_job(_payload(f"b{i}", None))  # user_id 없음 → 사용자별 한도 없음
+    with pytest.raises(q.QuotaExceeded, match="global"):
+        q.create_job(_payload("c1", "u2"))
+    assert _counter(q._GLOBAL_KEY) == 5
+    assert _counter("user:u1") == 2
+    assert _counter("user:u2") == 0
+
+
+def test_create_job_idempotent_reuses_key_and_active_job():
+    a = q.create_job_idempotent(_payload("t1"), idempotency_key="k1")
+    assert q.create_job_idempotent(_payload("t1"), idempotency_key="k1") == a
+    assert q.create_job_idempotent(_payload("t1")) == a  # 같은 task 의 활성 잡
+    assert q._jobs.count_documents({}) == 1
+    assert _counter(q._GLOBAL_KEY) == 1
+
+    q._jobs.update_one({"_id": q._oid(a)}, {"$set": {"status": "running", "worker_id": "w"}})
+    assert q.finish_job(a, "w", "succeeded")
+    assert _counter(q._GLOBAL_KEY) == 0
+    assert q.create_job_idempotent(_payload("t1"), idempotency_key="k1") == a  # key 는 종료 후에도 같은 run
+    b = q.create_job_idempotent(_payload("t1"))
+    assert b != a
+    assert _counter(q._GLOBAL_KEY) == 1
+
+
+def test_create_job_idempotent_force_creates_new_job():
+    a = q.create_job_idempotent(_payload("t1"))
+    b = q.create_job_idempotent(_payload("t1"), force=True)
+    assert a != b
+    assert _counter("user:u1") == 2
+
+
+def test_create_jobs_idempotent_batch():
+    existing = q.create_job_idempotent(_payload("t0"))
+    items = [
+        {"payload": _payload("t0"), "idempotency_key": "s:t0"},  # 활성 잡 재사용
+        {"payload": _payload("t1"), "idempotency_key": "s:t1"},
+        {"payload": _payload("t1"), "idempotency_key": "s:t1"},  # 배치 안 같은 key
+        {"payload": _payload("t2"), "idempotency_key": "s:t2"},  # u1 한도(2) 초과
+    ]
+    res = q.create_jobs_idempotent(items)
+    assert res["run_ids"][0] == existing
+    assert res["run_ids"][1] is not None and res["run_ids"][1] == res["run_ids"][2]
+    assert res["run_ids"][3] is None
+    assert "user active runs limit" in res["errors"][3]
+    assert _counter("user:u1") == 2
+
+    again = q.create_jobs_idempotent(items[:3])
+    assert again["run_ids"] == res["run_ids"][:3]
+    assert q._jobs.count_documents({}) == 2
+
+
+def test_create_jobs_idempotent_reports_global_limit(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_ACTIVE_RUNS_GLOBAL", 3)
+    monkeypatch.setattr(settings, "MAX_ACTIVE_RUNS_PER_USER", 10)
+    items = [{"payload": _payload(f"t{i}", "u1")} for i in range(5)]
+    res = q.create_jobs_idempotent(items)
+    assert [r is not None for r in res["run_ids"]] == [True, True, True, False, False]
+    assert all("global active runs limit" in res["errors"][i] for i in (3, 4))
+
+
+def test_create_jobs_idempotent_splits_user_and_global_messages(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_ACTIVE_RUNS_GLOBAL", 3)
+    monkeypatch.setattr(settings, "MAX_ACTIVE_RUNS_PER_USER", 1)
+    q.create_job(_payload("x", "u2"))  # 전역 남은 자리 2
+    items = [{"payload": _payload(f"t{i}", "u1")} for i in range(4)]
+    res = q.create_jobs_idempotent(items)
+    assert res["run_ids"][0] is not None
+    assert "user active runs limit" in res["errors"][1]  # 전역 자리는 있었지만 사용자 한도
+    assert "global active runs limit" in res["errors"][2]
+    assert "global active runs limit" in res["errors"][3]
+    assert _counter(q._GLOBAL_KEY) == 2